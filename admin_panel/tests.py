@@ -278,6 +278,15 @@ class AdminPanelAPITestCase(APITestCase):
         # Maintenance operations might have different responses
         self.assertIn(response.status_code, [200, 400, 500])
 
+    def test_advanced_analytics_counts(self):
+        """Test analytics user and torrent counts"""
+        response = self.client.get('/api/admin/analytics/', {'days': 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(response.data['user_stats']['total_users'], 2)
+        self.assertEqual(response.data['user_stats']['new_users'], 2)
+        self.assertEqual(response.data['torrent_stats']['total_torrents'], 0)
+
     def test_admin_action_logging(self):
         """Test that admin actions are properly logged"""
         # Perform an action that should be logged
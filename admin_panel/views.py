@@ -9,7 +9,8 @@ from django.core.paginator import Paginator
 
 from accounts.models import User, InviteCode, AuthToken
 from credits.models import CreditTransaction
-from security.models import SuspiciousActivity, IPBlock
+from security.models import SuspiciousActivity, IPBlock, AnnounceLog
+from torrents.models import Torrent, Peer
 from logging_monitoring.models import Alert, SystemLog, SystemStats
 from .models import AdminAction, SystemConfig
 from .serializers import (
@@ -601,15 +602,25 @@ def advanced_analytics(request):
 
     since_date = timezone.now() - timedelta(days=days)
 
-    # آمار کاربران
-    total_users = User.objects.count()
-    active_users = User.objects.filter(last_login__gte=since_date).count()
-    new_users = User.objects.filter(date_joined__gte=since_date).count()
-
-    # آمار تورنت
-    total_torrents = Torrent.objects.count()
-    active_torrents = Torrent.objects.filter(is_active=True).count()
-    new_torrents = Torrent.objects.filter(created_at__gte=since_date).count()
+    # آمار کاربران (یک پیمایش جدول)
+    user_counts = User.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(last_login__gte=since_date)),
+        new=Count('id', filter=Q(date_joined__gte=since_date)),
+    )
+    total_users = user_counts['total']
+    active_users = user_counts['active']
+    new_users = user_counts['new']
+
+    # آمار تورنت (یک پیمایش جدول)
+    torrent_counts = Torrent.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        new=Count('id', filter=Q(created_at__gte=since_date)),
+    )
+    total_torrents = torrent_counts['total']
+    active_torrents = torrent_counts['active']
+    new_torrents = torrent_counts['new']
 
     # آمار credit
     total_credit_transacted = CreditTransaction.objects.filter(
@@ -861,15 +872,26 @@ def system_performance_metrics(request):
         system_resources = {'error': 'psutil not available for system metrics'}
 
     # Application metrics
+    now = timezone.now()
+    last_hour = now - timedelta(hours=1)
+    last_day = now - timedelta(hours=24)
+    user_counts = User.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(last_login__gte=last_day)),
+    )
+    torrent_counts = Torrent.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+    )
     app_metrics = {
-        'total_users': User.objects.count(),
-        'active_users_24h': User.objects.filter(last_login__gte=timezone.now() - timedelta(hours=24)).count(),
-        'total_torrents': Torrent.objects.count(),
-        'active_torrents': Torrent.objects.filter(is_active=True).count(),
-        'total_peers': Peer.objects.filter(last_announced__gte=timezone.now() - timedelta(hours=1)).count(),
-        'credit_transactions_24h': CreditTransaction.objects.filter(created_at__gte=timezone.now() - timedelta(hours=24)).count(),
-        'system_logs_24h': SystemLog.objects.filter(timestamp__gte=timezone.now() - timedelta(hours=24)).count(),
-        'tracker_announces_1h': AnnounceLog.objects.filter(timestamp__gte=timezone.now() - timedelta(hours=1)).count()
+        'total_users': user_counts['total'],
+        'active_users_24h': user_counts['active'],
+        'total_torrents': torrent_counts['total'],
+        'active_torrents': torrent_counts['active'],
+        'total_peers': Peer.objects.filter(last_announced__gte=last_hour).count(),
+        'credit_transactions_24h': CreditTransaction.objects.filter(created_at__gte=last_day).count(),
+        'system_logs_24h': SystemLog.objects.filter(timestamp__gte=last_day).count(),
+        'tracker_announces_1h': AnnounceLog.objects.filter(timestamp__gte=last_hour).count()
     }
 
     return Response({
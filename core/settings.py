@@ -34,6 +34,9 @@ ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1,testserver'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Keep uploads up to the 10MB .torrent limit in memory instead of spilling to a temp file
+FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+
 
 # Application definition
 
@@ -1,10 +1,11 @@
 from celery import shared_task
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db import transaction
 from datetime import timedelta
 from django.db.models import Count, Sum, Q
 
-from .models import SystemStats, SystemLog
+from .models import SystemStats, SystemLog, UserActivity
 from accounts.models import User
 from credits.models import CreditTransaction
 from security.models import SuspiciousActivity, IPBlock
@@ -176,3 +177,18 @@ def monitor_performance():
         )
 
     return f"Performance check completed, {queries_count} queries executed"
+
+
+@shared_task(ignore_result=True)
+def record_user_activity(user_id, activity_type, description, ip_address, user_agent='', details=None, timestamp=None):
+    """ثبت فعالیت کاربر خارج از مسیر درخواست (timestamp زمان درخواست است، نه زمان اجرای task)"""
+
+    UserActivity.objects.create(
+        user_id=user_id,
+        activity_type=activity_type,
+        description=description,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        details=details or {},
+        timestamp=parse_datetime(timestamp) if timestamp else timezone.now()
+    )
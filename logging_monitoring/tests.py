@@ -7,6 +7,7 @@ from rest_framework import status
 from datetime import timedelta
 
 from .models import SystemLog, UserActivity, Alert, SystemStats
+from .tasks import record_user_activity
 
 User = get_user_model()
 
@@ -363,3 +364,30 @@ class LoggingMonitoringAPITestCase(APITestCase):
 
         response = self.client.post('/api/logs/bulk/', bulk_data, format='json')
         self.assertIn(response.status_code, [200, 400, 501])  # 501 if not implemented
+
+
+class LoggingTasksTestCase(TestCase):
+    """Tests for the logging Celery tasks"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='taskuser',
+            email='task@example.com',
+            password='testpass123'
+        )
+
+    def test_record_user_activity_task(self):
+        """Test the queued activity writer keeps the request timestamp"""
+        requested_at = timezone.now() - timedelta(minutes=5)
+        record_user_activity(
+            user_id=self.user.id,
+            activity_type='torrent_download',
+            description='Downloaded torrent: Queued',
+            ip_address='192.168.1.100',
+            details={'torrent_id': 1},
+            timestamp=requested_at.isoformat()
+        )
+
+        activity = UserActivity.objects.get(user=self.user, activity_type='torrent_download')
+        self.assertEqual(activity.timestamp, requested_at)
+        self.assertEqual(activity.details, {'torrent_id': 1})
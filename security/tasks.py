@@ -1,5 +1,6 @@
 from celery import shared_task
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db import transaction, models
 from datetime import timedelta
 
@@ -224,3 +225,25 @@ def update_security_stats():
         stats.save()
 
     return f"Updated security stats for {today}"
+
+
+@shared_task(ignore_result=True)
+def record_announce_log(torrent_id, user_id, event, uploaded, downloaded, left, ip_address, port, peer_id,
+                        user_agent='', suspicious_reason='', timestamp=None):
+    """ثبت لاگ announce خارج از مسیر درخواست (timestamp زمان announce است، نه زمان اجرای task)"""
+
+    AnnounceLog.objects.create(
+        user_id=user_id,
+        torrent_id=torrent_id,
+        event=event,
+        uploaded=uploaded,
+        downloaded=downloaded,
+        left=left,
+        ip_address=ip_address,
+        port=port,
+        peer_id=peer_id,
+        user_agent=user_agent,
+        is_suspicious=bool(suspicious_reason),
+        suspicious_reason=suspicious_reason,
+        timestamp=parse_datetime(timestamp) if timestamp else timezone.now()
+    )
@@ -29,6 +29,12 @@ class Colors:
     RESET = '\033[0m'
     BOLD = '\033[1m'
 
+def count_peers(peers) -> int:
+    """Count peers in an announce response (compact bytes or list of dicts)"""
+    if isinstance(peers, (bytes, bytearray)):
+        return len(peers) // 6
+    return len(peers) if peers else 0
+
 class BitTorrentClient:
     """Simulates a BitTorrent client"""
     
@@ -45,6 +51,11 @@ class BitTorrentClient:
         self.is_seeder = False
         self.is_active = False
         self.session = requests.Session()
+        self.rng = random.Random()
+        # Hoisted once so announce() avoids re-resolving them on every call
+        self._do_get = self.session.get
+        self._announce_url = f"{self.base_url}/announce"
+        self._static_params: Dict[str, str] = {}
         
     @staticmethod
     def generate_peer_id(client_name: str) -> str:
@@ -61,32 +72,42 @@ class BitTorrentClient:
         self.left = torrent_size
         self.auth_token = auth_token
         self.is_seeder = False
+        self._build_static_params()
     
     def set_auth_token(self, auth_token: str):
         """Set authentication token"""
         self.auth_token = auth_token
+        self._build_static_params()
+    
+    def _build_static_params(self):
+        """Cache the announce parameters that do not change between calls"""
+        params = {
+            "info_hash": self.info_hash,
+            "peer_id": self.peer_id,
+            "port": str(self.port),
+            "compact": "1",
+        }
+        if self.auth_token:
+            params["auth_token"] = self.auth_token
+        self._static_params = params
     
     def announce(self, event: str = "started") -> Dict:
         """Send announce request to tracker"""
         if not self.info_hash:
             return {"error": "No torrent set"}
         
+        session_get = self._do_get
+        url = self._announce_url
         params = {
-            "info_hash": self.info_hash,
-            "peer_id": self.peer_id,
-            "port": str(self.port),
+            **self._static_params,
             "uploaded": str(self.uploaded),
             "downloaded": str(self.downloaded),
             "left": str(self.left),
-            "compact": "1",
             "event": event,
         }
         
-        if self.auth_token:
-            params["auth_token"] = self.auth_token
-        
         try:
-            response = self.session.get(f"{self.base_url}/announce", params=params, timeout=10)
+            response = session_get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 try:
@@ -136,7 +157,7 @@ class BitTorrentClient:
         
         print(f"{Colors.GREEN}[{self.client_name}] Connected to tracker{Colors.RESET}")
         print(f"{Colors.BLUE}[{self.client_name}] Interval: {result.get('interval', 'N/A')} seconds{Colors.RESET}")
-        print(f"{Colors.BLUE}[{self.client_name}] Peers: {len(result.get('peers', b'')) // 6 if isinstance(result.get('peers'), bytes) else len(result.get('peers', []))}{Colors.RESET}")
+        print(f"{Colors.BLUE}[{self.client_name}] Peers: {count_peers(result.get('peers'))}{Colors.RESET}")
         
         # Simulate download progress
         chunk_size = speed_bytes_per_sec // 10  # Update 10 times per second
@@ -182,6 +203,11 @@ class BitTorrentClient:
         start_time = time.time()
         last_announce = 0
         
+        # Pre-generate one upload delta (1KB to 100KB) per second of seeding
+        randint = self.rng.randint
+        upload_deltas = [randint(1024, 1024 * 100) for _ in range(max(1, duration_seconds))]
+        tick = 0
+        
         # Initial announce
         result = self.announce("started")
         if "error" in result:
@@ -194,8 +220,8 @@ class BitTorrentClient:
             time.sleep(1)
             
             # Simulate upload
-            upload_chunk = random.randint(1024, 1024 * 100)  # 1KB to 100KB per second
-            self.uploaded += upload_chunk
+            self.uploaded += upload_deltas[tick % len(upload_deltas)]
+            tick += 1
             
             # Announce at intervals
             if time.time() - last_announce >= announce_interval:
@@ -203,7 +229,7 @@ class BitTorrentClient:
                 if "error" in result:
                     print(f"{Colors.RED}[{self.client_name}] Announce error: {result['error']}{Colors.RESET}")
                 else:
-                    peers = len(result.get('peers', b'')) // 6 if isinstance(result.get('peers'), bytes) else len(result.get('peers', []))
+                    peers = count_peers(result.get('peers'))
                     print(f"{Colors.GREEN}[{self.client_name}] Seeding - Uploaded: {self.uploaded / (1024*1024):.2f} MB, Peers: {peers}{Colors.RESET}")
                 last_announce = time.time()
         
@@ -250,12 +276,7 @@ class TrackerSimulator:
         print(f"   Interval: {result.get('interval', 'N/A')} seconds")
         print(f"   Min interval: {result.get('min interval', 'N/A')} seconds")
         
-        peers = result.get('peers', b'')
-        if isinstance(peers, bytes):
-            peer_count = len(peers) // 6
-        else:
-            peer_count = len(peers)
-        print(f"   Peers: {peer_count}")
+        print(f"   Peers: {count_peers(result.get('peers'))}")
         
         return True
     
@@ -329,8 +350,7 @@ class TrackerSimulator:
             if "error" in leecher_result or "failure reason" in leecher_result:
                 print(f"{Colors.RED}❌ Leecher {i+1} announce failed{Colors.RESET}")
             else:
-                peers = leecher_result.get('peers', b'')
-                peer_count = len(peers) // 6 if isinstance(peers, bytes) else len(peers)
+                peer_count = count_peers(leecher_result.get('peers'))
                 print(f"{Colors.GREEN}✅ Leecher {i+1} connected - Found {peer_count} peers{Colors.RESET}")
         
         # Simulate activity
@@ -0,0 +1,11 @@
+class InfoHashConverter:
+    """مبدل مسیر برای info_hash به صورت hex با ۴۰ کاراکتر"""
+
+    regex = '[a-fA-F0-9]{40}'
+
+    def to_python(self, value):
+        # هش‌ها در دیتابیس با حروف کوچک ذخیره می‌شوند
+        return value.lower()
+
+    def to_url(self, value):
+        return value
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-16 22:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0004_allow_null_user_in_peer'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='torrent',
+            name='torrents_to_info_ha_c9cc27_idx',
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+
+def hex_to_raw(apps, schema_editor):
+    Torrent = apps.get_model('torrents', 'Torrent')
+    for torrent in Torrent.objects.exclude(pieces_hash='').only('id', 'pieces_hash').iterator():
+        try:
+            raw = bytes.fromhex(torrent.pieces_hash)
+        except ValueError:
+            raw = b''
+        Torrent.objects.filter(pk=torrent.pk).update(pieces_hash_raw=raw)
+
+
+def raw_to_hex(apps, schema_editor):
+    Torrent = apps.get_model('torrents', 'Torrent')
+    for torrent in Torrent.objects.only('id', 'pieces_hash_raw').iterator():
+        if torrent.pieces_hash_raw:
+            Torrent.objects.filter(pk=torrent.pk).update(pieces_hash=bytes(torrent.pieces_hash_raw).hex())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0005_remove_torrent_info_hash_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torrent',
+            name='pieces_hash_raw',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.RunPython(hex_to_raw, raw_to_hex),
+        migrations.RemoveField(
+            model_name='torrent',
+            name='pieces_hash',
+        ),
+        migrations.RenameField(
+            model_name='torrent',
+            old_name='pieces_hash_raw',
+            new_name='pieces_hash',
+        ),
+    ]
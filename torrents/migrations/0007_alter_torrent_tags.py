@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-16 22:36
+
+import utils.helpers
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0006_torrent_pieces_hash_binary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='torrent',
+            name='tags',
+            field=models.JSONField(blank=True, default=list, encoder=utils.helpers.OrjsonEncoder),
+        ),
+    ]
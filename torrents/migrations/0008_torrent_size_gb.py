@@ -0,0 +1,23 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_size_gb(apps, schema_editor):
+    Torrent = apps.get_model('torrents', 'Torrent')
+    Torrent.objects.update(size_gb=F('size') / float(1024 ** 3))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0007_alter_torrent_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torrent',
+            name='size_gb',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(backfill_size_gb, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# icontains در PostgreSQL به صورت UPPER(col::text) LIKE UPPER(...) اجرا می‌شود؛
+# ایندکس‌های trigram روی همان عبارت ساخته می‌شوند تا جستجوی infix از ایندکس استفاده کند.
+# روی SQLite این مایگریشن کاری انجام نمی‌دهد.
+
+TRIGRAM_INDEXES = {
+    'torrents_torrent_name_trgm': 'name',
+    'torrents_torrent_description_trgm': 'description',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON torrents_torrent '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0008_torrent_size_gb'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
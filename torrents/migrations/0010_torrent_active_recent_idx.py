@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-16 22:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0009_torrent_search_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='torrent',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='torrent_active_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_peer_counts(apps, schema_editor):
+    Torrent = apps.get_model('torrents', 'Torrent')
+    TorrentStats = apps.get_model('torrents', 'TorrentStats')
+    stats = TorrentStats.objects.filter(torrent=OuterRef('pk'))
+    Torrent.objects.filter(stats__isnull=False).update(
+        seeders=Subquery(stats.values('seeders')[:1]),
+        leechers=Subquery(stats.values('leechers')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0010_torrent_active_recent_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torrent',
+            name='leechers',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='torrent',
+            name='seeders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_peer_counts, migrations.RunPython.noop),
+    ]
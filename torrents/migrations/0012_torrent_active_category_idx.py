@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-16 23:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0011_torrent_seeders_leechers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='torrent',
+            name='torrents_to_is_acti_977b82_idx',
+        ),
+        migrations.AddIndex(
+            model_name='torrent',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-created_at', '-id'], name='torrent_active_category_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+import socket
+import struct
+
+from django.db import migrations, models
+
+
+def backfill_compact_address(apps, schema_editor):
+    Peer = apps.get_model('torrents', 'Peer')
+    peers = []
+    for peer in Peer.objects.only('id', 'ip_address', 'port').iterator():
+        try:
+            peer.compact_address = struct.pack('>4sH', socket.inet_pton(socket.AF_INET, peer.ip_address), peer.port)
+        except (OSError, struct.error):
+            continue
+        peers.append(peer)
+    Peer.objects.bulk_update(peers, ['compact_address'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0012_torrent_active_category_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='peer',
+            name='compact_address',
+            field=models.BinaryField(default=b'', max_length=6),
+        ),
+        migrations.RunPython(backfill_compact_address, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-16 23:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torrents', '0013_peer_compact_address'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='peer',
+            index=models.Index(fields=['torrent', 'peer_id'], name='peer_torrent_peer_id_idx'),
+        ),
+    ]
@@ -1,7 +1,26 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from django.utils.functional import cached_property
 import hashlib
+import socket
+import struct
+
+from utils.helpers import OrjsonEncoder
+
+
+# IPv4 + port (big-endian) در پاسخ compact (BEP 23)
+COMPACT_PEER = struct.Struct('>4sH')
+
+
+def pack_compact_peer(ip_address, port):
+    """آدرس ۶ بایتی compact؛ برای IPv6 یا آدرس/پورت نامعتبر رشته خالی"""
+    if ':' in ip_address:
+        return b''
+    try:
+        return COMPACT_PEER.pack(socket.inet_pton(socket.AF_INET, ip_address), port)
+    except (OSError, struct.error):
+        return b''
 
 
 class Category(models.Model):
@@ -31,6 +50,7 @@ class Torrent(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     size = models.BigIntegerField()  # bytes
+    size_gb = models.FloatField(default=0.0)  # denormalized from size on save
     files_count = models.IntegerField(default=1)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -49,11 +69,13 @@ class Torrent(models.Model):
         blank=True,
         related_name='torrents'
     )
-    tags = models.JSONField(default=list, blank=True)  # لیست تگ‌ها
+    tags = models.JSONField(default=list, blank=True, encoder=OrjsonEncoder)  # لیست تگ‌ها
+    seeders = models.IntegerField(default=0)  # denormalized by tracker.views.update_torrent_stats
+    leechers = models.IntegerField(default=0)  # denormalized by tracker.views.update_torrent_stats
 
     # Metadata
     piece_length = models.IntegerField(null=True, blank=True)
-    pieces_hash = models.TextField(blank=True)  # concatenated piece hashes
+    pieces_hash = models.BinaryField(blank=True, default=b'')  # concatenated raw piece hashes
     announce_url = models.URLField(blank=True)
     comment = models.TextField(blank=True)
     created_by_client = models.CharField(max_length=100, blank=True)
@@ -61,12 +83,15 @@ class Torrent(models.Model):
     def __str__(self):
         return f"{self.name} ({self.info_hash[:8]})"
 
-    @property
-    def size_gb(self):
-        """سایز به گیگابایت"""
-        return self.size / (1024 ** 3)
+    def save(self, *args, **kwargs):
+        """محاسبه سایز به گیگابایت هنگام ذخیره"""
+        self.size_gb = self.size / (1024 ** 3)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'size' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'size_gb'}
+        super().save(*args, **kwargs)
 
-    @property
+    @cached_property
     def info_hash_display(self):
         """نمایش هش به صورت خوانا"""
         return self.info_hash.upper()
@@ -74,9 +99,19 @@ class Torrent(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['info_hash']),
+            # keyset pagination لیست تورنت‌های فعال
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='torrent_active_recent_idx'
+            ),
+            # فیلتر دسته‌بندی در لیست تورنت‌های فعال
+            models.Index(
+                fields=['category', '-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='torrent_active_category_idx'
+            ),
             models.Index(fields=['created_by']),
-            models.Index(fields=['is_active']),
             models.Index(fields=['category']),
         ]
 
@@ -146,10 +181,20 @@ class Peer(models.Model):
     first_announced = models.DateTimeField(default=timezone.now)
     last_announced = models.DateTimeField(default=timezone.now)
     user_agent = models.CharField(max_length=200, blank=True)
+    # ip/port به شکل آماده پاسخ compact، تا لیست peerها فقط الحاق بایت‌ها باشد
+    compact_address = models.BinaryField(max_length=6, default=b'')
 
     def __str__(self):
         return f"Peer {self.user.username} on {self.torrent.name}"
 
+    def save(self, *args, **kwargs):
+        """محاسبه آدرس compact هنگام ذخیره"""
+        self.compact_address = pack_compact_peer(self.ip_address, self.port)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'ip_address', 'port'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'compact_address'}
+        super().save(*args, **kwargs)
+
     @property
     def progress(self):
         """پیشرفت دانلود (0-100)"""
@@ -162,6 +207,8 @@ class Peer(models.Model):
         ordering = ['-last_announced']
         indexes = [
             models.Index(fields=['torrent', 'last_announced']),
+            # یافتن peer ناشناس با peer_id در هر announce
+            models.Index(fields=['torrent', 'peer_id'], name='peer_torrent_peer_id_idx'),
             models.Index(fields=['user']),
             models.Index(fields=['ip_address']),
             models.Index(fields=['is_seeder']),
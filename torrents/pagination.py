@@ -0,0 +1,24 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TorrentCursorPagination(CursorPagination):
+    """
+    Keyset pagination برای لیست تورنت‌ها
+
+    هزینه هر صفحه به عمق صفحه وابسته نیست؛ id به عنوان tiebreaker
+    به ترتیب اضافه می‌شود تا ترتیب یکتا باشد.
+    """
+
+    page_size = 20
+    ordering = ('-created_at', '-id')
+    orderings = {
+        'name': ('name', 'id'),
+        '-name': ('-name', '-id'),
+        'size': ('size', 'id'),
+        '-size': ('-size', '-id'),
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        return self.orderings.get(request.query_params.get('order_by'), self.ordering)
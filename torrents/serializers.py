@@ -1,6 +1,9 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Torrent, TorrentStats, Peer, Category
 
+MAX_TORRENT_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+
 
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer for categories"""
@@ -13,8 +16,8 @@ class CategorySerializer(serializers.ModelSerializer):
 class TorrentSerializer(serializers.ModelSerializer):
     """Serializer برای لیست تورنت‌ها"""
 
-    created_by_username = serializers.SerializerMethodField()
-    size_formatted = serializers.SerializerMethodField()
+    created_by_username = serializers.CharField(source='created_by.username', default='Anonymous', read_only=True)
+    size_formatted = serializers.FloatField(source='size_gb', read_only=True)
     age_days = serializers.SerializerMethodField()
     category_name = serializers.SerializerMethodField()
     category_slug = serializers.SerializerMethodField()
@@ -27,15 +30,12 @@ class TorrentSerializer(serializers.ModelSerializer):
             'category', 'category_name', 'category_slug', 'is_private', 'age_days'
         ]
 
-    def get_created_by_username(self, obj):
-        return obj.created_by.username if obj.created_by else 'Anonymous'
-
-    def get_size_formatted(self, obj):
-        return obj.size_gb
-
     def get_age_days(self, obj):
-        from django.utils import timezone
-        return (timezone.now() - obj.created_at).days
+        # age از annotate_age() می‌آید؛ بدون آن از created_at حساب می‌شود
+        age = getattr(obj, 'age', None)
+        if age is None:
+            age = timezone.now() - obj.created_at
+        return age.days
 
     def get_category_name(self, obj):
         return obj.category.name if obj.category else None
@@ -44,11 +44,36 @@ class TorrentSerializer(serializers.ModelSerializer):
         return obj.category.slug if obj.category else None
 
 
+class TorrentListSerializer(serializers.Serializer):
+    """Serializer سبک برای ردیف‌های values() در لیست تورنت‌ها"""
+
+    id = serializers.IntegerField(read_only=True)
+    info_hash = serializers.CharField(read_only=True)
+    name = serializers.CharField(read_only=True)
+    size = serializers.IntegerField(read_only=True)
+    size_formatted = serializers.FloatField(source='size_gb', read_only=True)
+    files_count = serializers.IntegerField(read_only=True)
+    created_by_username = serializers.CharField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
+    category = serializers.IntegerField(read_only=True)
+    category_name = serializers.CharField(source='category__name', read_only=True)
+    category_slug = serializers.CharField(source='category__slug', read_only=True)
+    is_private = serializers.BooleanField(read_only=True)
+    age_days = serializers.SerializerMethodField()
+
+    def get_age_days(self, row):
+        # age از annotate_age() می‌آید؛ بدون آن از created_at حساب می‌شود
+        age = row.get('age')
+        if age is None:
+            age = timezone.now() - row['created_at']
+        return age.days
+
+
 class TorrentDetailSerializer(serializers.ModelSerializer):
     """Serializer برای جزئیات تورنت"""
 
     created_by_username = serializers.SerializerMethodField()
-    size_formatted = serializers.SerializerMethodField()
+    size_formatted = serializers.FloatField(source='size_gb', read_only=True)
     stats = serializers.SerializerMethodField()
     health = serializers.SerializerMethodField()
     category_name = serializers.SerializerMethodField()
@@ -66,20 +91,10 @@ class TorrentDetailSerializer(serializers.ModelSerializer):
     def get_created_by_username(self, obj):
         return obj.created_by.username if obj.created_by else 'Anonymous'
 
-    def get_size_formatted(self, obj):
-        return obj.size_gb
-
     def get_stats(self, obj):
-        try:
-            stats = obj.stats
-            return {
-                'seeders': stats.seeders,
-                'leechers': stats.leechers,
-                'completed': stats.completed,
-                'total_uploaded': stats.total_uploaded,
-                'total_downloaded': stats.total_downloaded,
-            }
-        except TorrentStats.DoesNotExist:
+        # با select_related('stats') در view، نبود آمار بدون کوئری اضافه None برمی‌گرداند
+        stats = getattr(obj, 'stats', None)
+        if stats is None:
             return {
                 'seeders': 0,
                 'leechers': 0,
@@ -87,26 +102,17 @@ class TorrentDetailSerializer(serializers.ModelSerializer):
                 'total_uploaded': 0,
                 'total_downloaded': 0,
             }
+        return {
+            'seeders': stats.seeders,
+            'leechers': stats.leechers,
+            'completed': stats.completed,
+            'total_uploaded': stats.total_uploaded,
+            'total_downloaded': stats.total_downloaded,
+        }
 
     def get_health(self, obj):
-        try:
-            stats = obj.stats
-            seeders = stats.seeders
-            leechers = stats.leechers
-            total_peers = seeders + leechers
-
-            if total_peers == 0:
-                return {'score': 0, 'status': 'dead'}
-            elif seeders >= leechers:
-                score = min(100, (seeders / max(1, leechers)) * 50)
-                status = 'excellent' if score >= 80 else 'good'
-            else:
-                score = max(0, 50 - (leechers / max(1, seeders)) * 25)
-                status = 'poor' if score < 30 else 'fair'
-
-            return {'score': round(score, 1), 'status': status}
-        except TorrentStats.DoesNotExist:
-            return {'score': 0, 'status': 'dead'}
+        # مقادیر توسط annotate_health در view محاسبه می‌شوند
+        return {'score': obj.health_score, 'status': obj.health_status}
 
     def get_category_name(self, obj):
         return obj.category.name if obj.category else None
@@ -118,7 +124,7 @@ class TorrentDetailSerializer(serializers.ModelSerializer):
 class TorrentStatsSerializer(serializers.ModelSerializer):
     """Serializer برای آمار تورنت"""
 
-    torrent_name = serializers.SerializerMethodField()
+    torrent_name = serializers.CharField(source='torrent.name', read_only=True)
 
     class Meta:
         model = TorrentStats
@@ -127,17 +133,14 @@ class TorrentStatsSerializer(serializers.ModelSerializer):
             'total_uploaded', 'total_downloaded', 'last_updated'
         ]
 
-    def get_torrent_name(self, obj):
-        return obj.torrent.name
-
 
 class PeerSerializer(serializers.ModelSerializer):
     """Serializer برای peerها"""
 
-    user_username = serializers.SerializerMethodField()
-    progress = serializers.SerializerMethodField()
-    download_speed = serializers.SerializerMethodField()
-    upload_speed = serializers.SerializerMethodField()
+    user_username = serializers.CharField(source='user.username', read_only=True, allow_null=True)
+    progress = serializers.FloatField(source='progress_pct', read_only=True)  # requires annotate_progress()
+    download_speed = serializers.IntegerField(read_only=True, default=0)  # bytes/s, set from peer_speeds()
+    upload_speed = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = Peer
@@ -148,20 +151,6 @@ class PeerSerializer(serializers.ModelSerializer):
             'first_announced', 'last_announced', 'user_agent'
         ]
 
-    def get_user_username(self, obj):
-        return obj.user.username
-
-    def get_progress(self, obj):
-        return obj.progress
-
-    def get_download_speed(self, obj):
-        # TODO: Calculate actual speeds from announce intervals
-        return 0
-
-    def get_upload_speed(self, obj):
-        # TODO: Calculate actual speeds from announce intervals
-        return 0
-
 
 class TorrentUploadSerializer(serializers.Serializer):
     """Serializer برای آپلود تورنت"""
@@ -173,11 +162,12 @@ class TorrentUploadSerializer(serializers.Serializer):
 
     def validate_torrent_file(self, value):
         # بررسی اندازه فایل (حداکثر ۱۰MB)
-        if value.size > 10 * 1024 * 1024:
+        if value.size > MAX_TORRENT_FILE_SIZE:
             raise serializers.ValidationError("Torrent file too large (max 10MB)")
 
-        # بررسی نوع فایل
-        if not value.name.lower().endswith('.torrent'):
+        # بررسی نوع فایل (فقط پسوند، بدون lower() روی کل نام)
+        name = value.name
+        if len(name) < 8 or name[-8:].lower() != '.torrent':
             raise serializers.ValidationError("File must be a .torrent file")
 
         return value
@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Torrent
+
+# پاسخ torrent_categories در cache نگه داشته می‌شود و با هر تغییر دسته‌بندی یا تورنت باطل می‌شود
+CATEGORIES_CACHE_KEY = 'torrent:categories'
+CATEGORIES_CACHE_TIMEOUT = 300
+
+# تورنتِ هر info_hash برای announce در cache کوتاه‌مدت نگه داشته می‌شود (tracker/views.py)
+TRACKER_TORRENT_CACHE_KEY = 'tracker:torrent:{}'
+TRACKER_TORRENT_CACHE_TIMEOUT = 30
+
+
+def invalidate_categories_cache():
+    """حذف لیست دسته‌بندی‌ها (با تعداد تورنت‌ها) از cache"""
+    cache.delete(CATEGORIES_CACHE_KEY)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Torrent)
+@receiver(post_delete, sender=Torrent)
+def categories_changed(sender, **kwargs):
+    invalidate_categories_cache()
+
+
+@receiver(post_save, sender=Torrent)
+@receiver(post_delete, sender=Torrent)
+def torrent_changed(sender, instance, **kwargs):
+    cache.delete(TRACKER_TORRENT_CACHE_KEY.format(instance.info_hash))
@@ -7,9 +7,17 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from datetime import timedelta
 from decimal import Decimal
+import hashlib
+from unittest.mock import patch
 
+from fastbencode import bdecode, bencode
 from accounts.models import AuthToken
-from .models import Torrent, Peer, TorrentStats
+from credits.models import CreditTransaction
+from logging_monitoring.models import SystemLog, UserActivity
+from security.models import AnnounceLog
+from .models import Torrent, Peer, TorrentStats, Category
+from .serializers import TorrentSerializer
+from .views import info_dict_span
 
 User = get_user_model()
 
@@ -341,3 +349,458 @@ class TorrentsAPITestCase(APITestCase):
         torrent_names = [t['name'] for t in data]
         self.assertIn('Test Torrent 1', torrent_names)
         # torrent2 might not appear if it's private
+
+
+class TorrentSerializationTestCase(APITestCase):
+    """Response shape tests for the torrent list/detail serializers"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='serialuser',
+            email='serial@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Software', slug='software')
+
+        self.torrent = Torrent.objects.create(
+            info_hash='ccddeeff00112233445566778899aabbccddeeff',
+            name='Owned Torrent',
+            size=2 * 1024 ** 3,
+            created_by=self.user,
+            created_at=timezone.now() - timedelta(days=3),
+            category=self.category,
+            is_private=False,
+            seeders=3,
+            leechers=1
+        )
+        self.orphan = Torrent.objects.create(
+            info_hash='ddeeff00112233445566778899aabbccddeeff00',
+            name='Orphan Torrent',
+            size=1024 ** 3,
+            created_by=None,
+            is_private=False
+        )
+        TorrentStats.objects.create(torrent=self.torrent, seeders=3, leechers=1)
+
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_fields(self):
+        """Test list rows expose source-backed fields"""
+        with self.assertNumQueries(1):  # cursor pagination, no COUNT
+            response = self.client.get('/api/torrents/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = {row['info_hash']: row for row in response.data['results']}
+        owned = rows[self.torrent.info_hash]
+        self.assertEqual(owned['created_by_username'], 'serialuser')
+        self.assertEqual(owned['size_formatted'], 2.0)
+        self.assertEqual(owned['age_days'], 3)
+        self.assertEqual(owned['category_name'], 'Software')
+        self.assertEqual(owned['category_slug'], 'software')
+
+        orphan = rows[self.orphan.info_hash]
+        self.assertEqual(orphan['created_by_username'], 'Anonymous')
+        self.assertEqual(orphan['age_days'], 0)
+        self.assertIsNone(orphan['category_name'])
+
+    def test_age_days_without_annotation(self):
+        """Test age_days falls back to created_at when the queryset was not annotated with age"""
+        torrent = Torrent.objects.get(pk=self.torrent.pk)
+        self.assertEqual(TorrentSerializer(torrent).data['age_days'], 3)
+
+    def test_user_torrents_fields(self):
+        """Test my-torrents rows carry the annotated age and joined names in one query"""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/torrents/my-torrents/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = response.data['user_torrents']
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['age_days'], 3)
+        self.assertEqual(rows[0]['created_by_username'], 'serialuser')
+        self.assertEqual(rows[0]['category_name'], 'Software')
+
+    def test_detail_stats_and_health(self):
+        """Test detail view reads stats in a single query, with or without a stats row"""
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stats']['seeders'], 3)
+        self.assertEqual(response.data['health'], {'score': 100, 'status': 'excellent'})
+
+        response = self.client.get(f'/api/torrents/{self.orphan.info_hash}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stats']['seeders'], 0)
+        self.assertEqual(response.data['health'], {'score': 0, 'status': 'dead'})
+
+    def test_health_endpoint(self):
+        """Test health score/status computed by the database annotation"""
+        response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/health/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['health_score'], 100)
+        self.assertEqual(response.data['health_status'], 'excellent')
+        self.assertEqual(response.data['total_peers'], 4)
+
+        # seeders/leechers are denormalized onto the torrent by the tracker's update_torrent_stats
+        Torrent.objects.filter(pk=self.orphan.pk).update(seeders=1, leechers=3)
+        response = self.client.get(f'/api/torrents/{self.orphan.info_hash}/health/')
+        self.assertEqual(response.data['health_score'], 0)
+        self.assertEqual(response.data['health_status'], 'poor')
+
+        Torrent.objects.filter(pk=self.orphan.pk).update(seeders=2, leechers=3)
+        response = self.client.get(f'/api/torrents/{self.orphan.info_hash}/health/')
+        self.assertAlmostEqual(response.data['health_score'], 12.5)
+        self.assertEqual(response.data['health_status'], 'poor')
+
+        Torrent.objects.filter(pk=self.orphan.pk).update(seeders=4, leechers=5)
+        response = self.client.get(f'/api/torrents/{self.orphan.info_hash}/health/')
+        self.assertAlmostEqual(response.data['health_score'], 18.8)
+
+    def test_stats_view(self):
+        """Test stats view joins the torrent and creates missing stats rows"""
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['torrent_name'], 'Owned Torrent')
+        self.assertEqual(response.data['seeders'], 3)
+
+        response = self.client.get(f'/api/torrents/{self.orphan.info_hash}/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['torrent_name'], 'Orphan Torrent')
+        self.assertTrue(TorrentStats.objects.filter(torrent=self.orphan).exists())
+
+    def test_info_hash_route_is_case_insensitive(self):
+        """Test the infohash path converter normalises the hash to lowercase"""
+        response = self.client.get(f'/api/torrents/{self.torrent.info_hash.upper()}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['info_hash'], self.torrent.info_hash)
+
+    def test_peers_progress(self):
+        """Test peer progress is annotated and anonymous peers serialize"""
+        Peer.objects.create(
+            torrent=self.torrent,
+            user=self.user,
+            peer_id='-qB0001-serialpeer01',
+            ip_address='192.168.1.100',
+            port=6881,
+            left=self.torrent.size // 4,
+        )
+        Peer.objects.create(
+            torrent=self.torrent,
+            user=None,
+            peer_id='-qB0001-serialpeer02',
+            ip_address='192.168.1.101',
+            port=6882,
+            left=0,
+            is_seeder=True
+        )
+
+        response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/peers/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        peers = {peer['peer_id']: peer for peer in response.data['active_peers']}
+        self.assertAlmostEqual(peers['-qB0001-serialpeer01']['progress'], 75.0)
+        self.assertEqual(peers['-qB0001-serialpeer01']['user_username'], 'serialuser')
+        self.assertAlmostEqual(peers['-qB0001-serialpeer02']['progress'], 100.0)
+        self.assertIsNone(peers['-qB0001-serialpeer02']['user_username'])
+
+    def test_peers_speed_from_announce_log(self):
+        """Test peer speeds are derived from the last two announces of each peer"""
+        Peer.objects.create(
+            torrent=self.torrent,
+            user=self.user,
+            peer_id='-qB0001-serialpeer01',
+            ip_address='192.168.1.100',
+            port=6881,
+            left=self.torrent.size
+        )
+        now = timezone.now()
+        for offset, uploaded, downloaded in [(120, 0, 0), (60, 6000, 0), (0, 12000, 30000)]:
+            AnnounceLog.objects.create(
+                user=self.user,
+                torrent=self.torrent,
+                event='',
+                uploaded=uploaded,
+                downloaded=downloaded,
+                left=self.torrent.size,
+                ip_address='192.168.1.100',
+                port=6881,
+                peer_id='-qB0001-serialpeer01',
+                timestamp=now - timedelta(seconds=offset)
+            )
+
+        response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/peers/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        peer = response.data['active_peers'][0]
+        self.assertEqual(peer['upload_speed'], 100)
+        self.assertEqual(peer['download_speed'], 500)
+
+    def test_popular_rows(self):
+        """Test popular torrents are ranked by recent peers and share the list row shape"""
+        for index in range(2):
+            Peer.objects.create(
+                torrent=self.orphan,
+                user=None,
+                peer_id=f'-qB0001-popularpeer{index}',
+                ip_address='192.168.1.100',
+                port=6881 + index,
+                left=0
+            )
+        Peer.objects.create(
+            torrent=self.torrent,
+            user=self.user,
+            peer_id='-qB0001-popularpeer9',
+            ip_address='192.168.1.101',
+            port=6890,
+            left=0
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/torrents/popular/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = response.data['popular_torrents']
+        self.assertEqual([row['info_hash'] for row in rows], [self.orphan.info_hash, self.torrent.info_hash])
+        self.assertEqual(rows[0]['created_by_username'], 'Anonymous')
+        self.assertEqual(rows[1]['age_days'], 3)
+
+    def test_list_cursor_pagination(self):
+        """Test list pages follow the cursor and respect order_by"""
+        for index in range(25):
+            Torrent.objects.create(
+                info_hash=f'{index:040x}',
+                name=f'Bulk {index:02d}',
+                size=index + 1,
+                is_private=False
+            )
+
+        response = self.client.get('/api/torrents/?order_by=size')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_page = response.data['results']
+        self.assertEqual(len(first_page), 20)
+        self.assertEqual([row['size'] for row in first_page], sorted(row['size'] for row in first_page))
+        self.assertNotIn('count', response.data)
+
+        response = self.client.get(response.data['next'])
+        second_page = response.data['results']
+        self.assertEqual(len(second_page), 7)
+        self.assertIsNone(response.data['next'])
+        seen = {row['id'] for row in first_page} | {row['id'] for row in second_page}
+        self.assertEqual(len(seen), 27)
+
+    def test_list_cursor_pagination_breaks_ties_by_id(self):
+        """Test rows with equal sort keys are ordered by id and neither repeated nor skipped across pages"""
+        for index in range(25):
+            Torrent.objects.create(info_hash=f'{index + 100:040x}', name='Same Name', size=4096, is_private=False)
+
+        for order_by in ('name', '-size'):
+            ids = []
+            url = f'/api/torrents/?order_by={order_by}&search=Same'
+            while url:
+                response = self.client.get(url)
+                ids += [row['id'] for row in response.data['results']]
+                url = response.data['next']
+            expected = sorted(ids, reverse=order_by.startswith('-'))
+            self.assertEqual(ids, expected)
+            self.assertEqual(len(set(ids)), 25)
+
+    def test_categories_cached_until_change(self):
+        """Test category counts are served from cache and refreshed on torrent changes"""
+        response = self.client.get('/api/torrents/categories/')
+        self.assertEqual(response.data['categories'][0]['count'], 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/torrents/categories/')
+        self.assertEqual(response.data['categories'][0]['count'], 1)
+
+        self.orphan.category = self.category
+        self.orphan.save()
+
+        response = self.client.get('/api/torrents/categories/')
+        self.assertEqual(response.data['categories'][0]['count'], 2)
+
+    def test_download_round_trip(self):
+        """Test served torrent files decode with bytes keys and keep the stored metadata"""
+        self.torrent.pieces_hash = bytes(range(20))
+        self.torrent.announce_url = 'http://tracker.example/announce'
+        self.torrent.save()
+
+        with patch('torrents.views.record_user_activity.delay') as enqueue:
+            response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/download/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(enqueue.call_args.kwargs['activity_type'], 'torrent_download')
+        self.assertFalse(UserActivity.objects.filter(user=self.user).exists())
+
+        torrent_dict = bdecode(response.content)
+        self.assertEqual(torrent_dict[b'announce'], b'http://tracker.example/announce')
+        self.assertEqual(torrent_dict[b'info'][b'name'], b'Owned Torrent')
+        self.assertEqual(torrent_dict[b'info'][b'pieces'], bytes(range(20)))
+        self.assertEqual(torrent_dict[b'info'][b'length'], 2 * 1024 ** 3)
+
+    def test_upload_rejects_non_dict_info(self):
+        """Test a bencoded file without an info dictionary is rejected"""
+        torrent_file = SimpleUploadedFile('bad.torrent', bencode({b'info': 1}))
+        response = self.client.post('/api/torrents/upload/', {'torrent_file': torrent_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_hashes_raw_info_bytes(self):
+        """Test the info hash is taken over the uploaded bytes, not a re-encoded dict"""
+        info = b'd6:lengthi5e4:name3:dup12:piece lengthi16384ee'
+        Torrent.objects.create(
+            info_hash=hashlib.sha1(info).hexdigest(),
+            name='Duplicate',
+            size=5,
+            created_by=self.user
+        )
+
+        torrent_file = SimpleUploadedFile('dup.torrent', b'd8:announce3:url4:info' + info + b'e')
+        with patch('torrents.views.bdecode') as full_parse:
+            response = self.client.post('/api/torrents/upload/', {'torrent_file': torrent_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        full_parse.assert_not_called()
+
+    def test_upload_rejects_malformed_bencode(self):
+        """Test truncated or negative-length input is rejected by the pre-parse scan"""
+        for data in [b'd4:infod4:name', b'd4:info-3:abce', b'not bencode']:
+            torrent_file = SimpleUploadedFile('broken.torrent', data)
+            response = self.client.post('/api/torrents/upload/', {'torrent_file': torrent_file}, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_info_dict_span_rejects_non_digit_lengths(self):
+        """Test string lengths with whitespace, signs or underscores are rejected instead of parsed by int()"""
+        for data in [b'd 4:infode', b'd+4:infode', b'd4:info1_0:abcdefghije', b'd4:infod4:name +3:abcee']:
+            with self.assertRaises(ValueError):
+                info_dict_span(data)
+        self.assertEqual(info_dict_span(b'd4:infod4:name3:abcee'), (7, 20))
+
+    def test_upload_commits_torrent_credit_and_logs(self):
+        """Test a successful upload stores the torrent, its stats, the credit and the audit rows"""
+        info = {b'length': 2 * 1024 ** 3, b'name': b'Fresh Upload', b'piece length': 262144, b'pieces': bytes(20)}
+        torrent_file = SimpleUploadedFile('fresh.torrent', bencode({b'info': info}))
+        response = self.client.post('/api/torrents/upload/', {'torrent_file': torrent_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        torrent = Torrent.objects.get(info_hash=hashlib.sha1(bencode(info)).hexdigest())
+        self.assertEqual(torrent.name, 'Fresh Upload')
+        self.assertTrue(TorrentStats.objects.filter(torrent=torrent).exists())
+        self.assertEqual(CreditTransaction.objects.get(torrent=torrent).amount, Decimal('2.00'))
+        activity = UserActivity.objects.get(user=self.user, activity_type='torrent_upload')
+        self.assertEqual(activity.details['credits_earned'], '2.00')
+        self.assertTrue(SystemLog.objects.filter(details__torrent_id=torrent.id).exists())
+
+    def test_download_etag_and_cache(self):
+        """Test downloads carry an ETag, answer 304 for it and reuse the cached file until the torrent changes"""
+        with patch('torrents.views.record_user_activity.delay'):
+            response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/download/')
+            etag = response['ETag']
+
+            with patch('torrents.views.generate_torrent_file') as generate:
+                response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/download/')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                generate.assert_not_called()
+
+                response = self.client.get(
+                    f'/api/torrents/{self.torrent.info_hash}/download/', HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+            self.torrent.comment = 'changed'
+            self.torrent.save()
+            response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/download/')
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertEqual(bdecode(response.content)[b'comment'], b'changed')
+
+    def test_download_etag_weak_and_list_validators(self):
+        """Test If-None-Match also matches weak validators and comma-separated lists"""
+        with patch('torrents.views.record_user_activity.delay'):
+            etag = self.client.get(f'/api/torrents/{self.torrent.info_hash}/download/')['ETag']
+            for header in [f'W/{etag}', f'"other", {etag}', f'"other", W/{etag}', '*']:
+                response = self.client.get(
+                    f'/api/torrents/{self.torrent.info_hash}/download/', HTTP_IF_NONE_MATCH=header
+                )
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, header)
+
+            response = self.client.get(
+                f'/api/torrents/{self.torrent.info_hash}/download/', HTTP_IF_NONE_MATCH='W/"other"'
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_download_survives_broker_errors(self):
+        """Test a failure to queue the download activity is logged instead of failing the download"""
+        with patch('torrents.views.record_user_activity.delay', side_effect=OSError('broker down')) as delay:
+            response = self.client.get(f'/api/torrents/{self.torrent.info_hash}/download/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        delay.assert_called_once()
+        self.assertFalse(SystemLog.objects.filter(level='error').exists())
+
+    def test_upload_tolerates_invalid_utf8_name(self):
+        """Test malformed UTF-8 in the torrent name is replaced instead of failing the upload"""
+        info = {b'length': 1024, b'name': b'Bad \xff Name', b'piece length': 16384, b'pieces': bytes(20)}
+        torrent_file = SimpleUploadedFile('bad-name.torrent', bencode({b'info': info}))
+        response = self.client.post('/api/torrents/upload/', {'torrent_file': torrent_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['torrent']['name'], 'Bad \ufffd Name')
+
+    def test_upload_accepts_unsorted_keys(self):
+        """Test torrents with non-canonical key order still upload, hashed over their original info bytes"""
+        info = b'd4:name8:Unsorted6:lengthi2048e12:piece lengthi16384e6:pieces20:' + bytes(20) + b'e'
+        data = b'd4:info' + info + b'8:announce4:httpe'
+        torrent_file = SimpleUploadedFile('unsorted.torrent', data)
+        response = self.client.post('/api/torrents/upload/', {'torrent_file': torrent_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        torrent = Torrent.objects.get(info_hash=hashlib.sha1(info).hexdigest())
+        self.assertEqual((torrent.name, torrent.size), ('Unsorted', 2048))
+
+    def test_upload_multi_file_size(self):
+        """Test multi-file torrents sum their file lengths and reject entries without one"""
+        files = [{b'length': 1000, b'path': [b'a']}, {b'length': 24, b'path': [b'b']}]
+        info = {b'files': files, b'name': b'Multi', b'piece length': 16384, b'pieces': bytes(20)}
+        torrent_file = SimpleUploadedFile('multi.torrent', bencode({b'info': info}))
+        response = self.client.post('/api/torrents/upload/', {'torrent_file': torrent_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        torrent = Torrent.objects.get(name='Multi')
+        self.assertEqual((torrent.size, torrent.files_count), (1024, 2))
+
+        info[b'files'] = [{b'path': [b'c']}]
+        info[b'name'] = b'Broken'
+        torrent_file = SimpleUploadedFile('broken.torrent', bencode({b'info': info}))
+        response = self.client.post('/api/torrents/upload/', {'torrent_file': torrent_file}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_numeric_category_slug_resolves(self):
+        """Test an all-digit value still finds a category whose slug or name is numeric"""
+        numeric = Category.objects.create(name='2024', slug='2024')
+        info = {b'length': 10, b'name': b'Numeric Cat', b'piece length': 16384, b'pieces': bytes(20)}
+        torrent_file = SimpleUploadedFile('numeric.torrent', bencode({b'info': info}))
+        response = self.client.post(
+            '/api/torrents/upload/', {'torrent_file': torrent_file, 'category': '2024'}, format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['torrent']['category'], numeric.id)
+
+        response = self.client.get('/api/torrents/?category=2024')
+        self.assertEqual([row['name'] for row in response.data['results']], ['Numeric Cat'])
+
+        # An id match wins over another category's numeric slug
+        Category.objects.create(name='Clash', slug=str(self.category.id))
+        torrent_file = SimpleUploadedFile('clash.torrent', bencode({b'info': {**info, b'name': b'Clash'}}))
+        response = self.client.post(
+            '/api/torrents/upload/', {'torrent_file': torrent_file, 'category': str(self.category.id)}, format='multipart'
+        )
+        self.assertEqual(response.data['torrent']['category'], self.category.id)
+
+    def test_upload_and_list_resolve_category(self):
+        """Test uploads and list filters accept a category id, slug or name"""
+        for index, value in enumerate([str(self.category.id), 'software', 'Software']):
+            info = {b'length': 10, b'name': f'Cat {index}'.encode(), b'piece length': 16384, b'pieces': bytes(20)}
+            torrent_file = SimpleUploadedFile('cat.torrent', bencode({b'info': info}))
+            response = self.client.post(
+                '/api/torrents/upload/', {'torrent_file': torrent_file, 'category': value}, format='multipart'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data['torrent']['category'], self.category.id)
+
+        for value in [str(self.category.id), 'software', 'Software']:
+            response = self.client.get(f'/api/torrents/?category={value}')
+            self.assertEqual(len(response.data['results']), 4)
@@ -0,0 +1,13 @@
+from django.urls import path
+from . import views
+
+# مسیرهای زیر /<info_hash>/ ؛ بدون app_name تا نام‌ها در فضای نام torrents بمانند
+
+urlpatterns = [
+    path('', views.TorrentDetailView.as_view(), name='detail'),
+    path('stats/', views.TorrentStatsView.as_view(), name='stats'),
+    path('peers/', views.torrent_peers, name='peers'),
+    path('health/', views.torrent_health, name='health'),
+    path('delete/', views.delete_torrent, name='delete'),
+    path('download/', views.download_torrent, name='download'),
+]
@@ -1,19 +1,234 @@
+import hashlib
+from decimal import Decimal
+from operator import itemgetter
+
+import bencode as lenient_bencode
+from fastbencode import bdecode, bencode
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Q
+from django.db.models import (
+    Count, Sum, Q, F, Case, When, Value, CharField, DurationField, FloatField, ExpressionWrapper
+)
+from django.db.models import Window
+from django.db.models.functions import Cast, Coalesce, Greatest, Lead, Least, Now, Round, RowNumber
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+from django.conf import settings
+from django.db import transaction
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.http import parse_etags
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
 
 from .models import Torrent, TorrentStats, Peer, Category
+from .pagination import TorrentCursorPagination
+from .signals import CATEGORIES_CACHE_KEY, CATEGORIES_CACHE_TIMEOUT
 from .serializers import (
-    TorrentSerializer, TorrentStatsSerializer,
-    TorrentDetailSerializer, PeerSerializer
+    TorrentListSerializer, TorrentStatsSerializer,
+    TorrentDetailSerializer, PeerSerializer, MAX_TORRENT_FILE_SIZE
 )
 from credits.models import CreditTransaction
 from accounts.models import User
-from utils.helpers import get_client_ip
+from logging_monitoring.models import SystemLog, UserActivity
+from logging_monitoring.tasks import record_user_activity
+from security.models import AnnounceLog
+from utils.helpers import enqueue_task, get_client_ip
+
+BYTES_PER_GB = Decimal(1024 ** 3)
+CREDIT_QUANTUM = Decimal('0.01')  # اعتبارها با دو رقم اعشار ذخیره می‌شوند
+
+
+def annotate_age(queryset):
+    """Annotate torrents with their age, computed by the database"""
+    return queryset.annotate(
+        age=ExpressionWrapper(Now() - F('created_at'), output_field=DurationField())
+    )
+
+
+def torrent_list_values(queryset):
+    """Rows for TorrentListSerializer: one query joining creator and category, no model instances"""
+    return queryset.values(
+        'id', 'info_hash', 'name', 'size', 'size_gb', 'files_count', 'created_at',
+        'category', 'category__name', 'category__slug', 'is_private', 'age',
+        created_by_username=Coalesce('created_by__username', Value('Anonymous')),
+    )
+
+
+def annotate_health(queryset):
+    """Annotate torrents with the health score/status, computed by the database from the denormalized peer counts"""
+    seeders = Cast(F('seeders'), FloatField())
+    leechers = Cast(F('leechers'), FloatField())
+    seeders_lead = GreaterThanOrEqual(F('seeders'), F('leechers'))
+    seed_score = Least(Value(100.0), seeders / Greatest(leechers, Value(1.0)) * 50)
+    leech_score = Greatest(Value(0.0), 50 - leechers / Greatest(seeders, Value(1.0)) * 25)
+
+    return queryset.annotate(
+        health_score=Round(
+            Case(
+                When(seeders=0, leechers=0, then=Value(0.0)),
+                When(seeders_lead, then=seed_score),
+                default=leech_score,
+                output_field=FloatField(),
+            ),
+            1,
+        ),
+        health_status=Case(
+            When(seeders=0, leechers=0, then=Value('dead')),
+            When(seeders_lead & GreaterThanOrEqual(seed_score, 80), then=Value('excellent')),
+            When(seeders_lead, then=Value('good')),
+            When(LessThan(leech_score, 30), then=Value('poor')),
+            default=Value('fair'),
+            output_field=CharField(),
+        ),
+    )
+
+
+def annotate_progress(queryset):
+    """Annotate peers with their download progress (0-100), computed by the database"""
+    return queryset.annotate(
+        progress_pct=Case(
+            When(torrent__size=0, then=Value(100.0)),
+            default=(F('torrent__size') - F('left')) * 100.0 / F('torrent__size'),
+            output_field=FloatField(),
+        )
+    )
+
+
+def peer_speeds(torrent, since):
+    """
+    Download/upload speed (bytes/s) per peer_id from its last two announces.
+
+    Windows over AnnounceLog number each peer's announces newest first and
+    pair every row with the one before it (LEAD in that order); filtering on
+    the row number keeps only the latest pair, so one row per peer leaves
+    the database.
+    """
+    window = {'partition_by': [F('peer_id')], 'order_by': [F('timestamp').desc(), F('id').desc()]}
+    rows = AnnounceLog.objects.filter(
+        torrent=torrent,
+        timestamp__gte=since
+    ).annotate(
+        row_number=Window(RowNumber(), **window),
+        prev_uploaded=Window(Lead('uploaded'), **window),
+        prev_downloaded=Window(Lead('downloaded'), **window),
+        prev_timestamp=Window(Lead('timestamp'), **window),
+    ).filter(row_number=1).values_list(
+        'peer_id', 'uploaded', 'downloaded', 'timestamp',
+        'prev_uploaded', 'prev_downloaded', 'prev_timestamp'
+    )
+
+    speeds = {}
+    for peer_id, uploaded, downloaded, timestamp, prev_uploaded, prev_downloaded, prev_timestamp in rows:
+        elapsed = (timestamp - prev_timestamp).total_seconds() if prev_timestamp else 0
+        if elapsed <= 0:
+            speeds[peer_id] = (0, 0)
+            continue
+        speeds[peer_id] = (
+            int(max(0, downloaded - prev_downloaded) / elapsed),
+            int(max(0, uploaded - prev_uploaded) / elapsed),
+        )
+    return speeds
+
+
+def category_lookup(value, prefix=''):
+    """Q for a category given by id (digits) or by slug/name; prefix e.g. 'category__' for related lookups"""
+    lookup = Q(**{f'{prefix}slug': value}) | Q(**{f'{prefix}name': value})
+    if value.isdigit():
+        # slug/name عددی (مثلاً "2024") هم باید پیدا شود
+        lookup |= Q(**{f'{prefix}id': int(value)})
+    return lookup
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match with weak comparison, as django.utils.cache does: W/ tags, lists and '*' all match"""
+    etags = parse_etags(if_none_match or '')
+    if etags == ['*']:
+        return True
+    return etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in etags}
+
+
+def bencode_text(mapping, key, default=''):
+    """Text value of a bencoded dict entry; invalid UTF-8 is replaced instead of raising"""
+    value = mapping.get(key)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return default
+
+
+def _bencode_bytes(value):
+    """bencode.py output (str keys/values) as the bytes tree fastbencode produces"""
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    if isinstance(value, dict):
+        return {_bencode_bytes(key): _bencode_bytes(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_bencode_bytes(item) for item in value]
+    return value
+
+
+def decode_torrent(data):
+    """
+    Decode an uploaded .torrent file.
+
+    fastbencode rejects dicts whose keys are not sorted, but many clients
+    produce such files and bencode.py used to accept them; those fall back
+    to the tolerant decoder and are converted to the same bytes-keyed shape.
+    """
+    try:
+        return bdecode(data)
+    except ValueError:
+        return _bencode_bytes(lenient_bencode.decode(data))
+
+
+def _bencode_value_end(data, pos):
+    """Offset just past the bencoded value starting at pos; raises ValueError/IndexError on malformed input"""
+    depth = 0
+    while True:
+        token = data[pos]
+        if token in b'ld':
+            depth += 1
+            pos += 1
+        elif token == ord('e'):
+            depth -= 1
+            pos += 1
+        elif token == ord('i'):
+            pos = data.index(b'e', pos) + 1
+        else:
+            colon = data.index(b':', pos)
+            length_bytes = data[pos:colon]
+            if not length_bytes.isdigit():
+                raise ValueError('invalid string length')
+            pos = colon + 1 + int(length_bytes)
+        if depth == 0:
+            return pos
+
+
+def info_dict_span(data):
+    """
+    (start, end) of the raw `info` dict in a bencoded torrent, or None.
+
+    The info hash is the SHA-1 of these exact bytes, so hashing the slice
+    avoids re-encoding the parsed dict just to hash it. Only the top-level
+    keys are walked, so this is cheap enough to run before the full parse;
+    malformed input raises ValueError/IndexError.
+    """
+    if data[:1] != b'd':
+        return None
+    pos = 1
+    while data[pos] != ord('e'):
+        colon = data.index(b':', pos)
+        length_bytes = data[pos:colon]
+        if not length_bytes.isdigit():
+            raise ValueError('invalid string length')
+        key_end = colon + 1 + int(length_bytes)
+        key = data[colon + 1:key_end]
+        value_end = _bencode_value_end(data, key_end)
+        if key == b'info':
+            return (key_end, value_end) if data[key_end] == ord('d') else None
+        pos = value_end
+    return None
 
 
 @extend_schema(
@@ -33,47 +248,42 @@ from utils.helpers import get_client_ip
             location=OpenApiParameter.QUERY,
             description='Search torrents by name or description'
         ),
+        OpenApiParameter(
+            name='order_by',
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description='Sort order: name, size or created_at, optionally prefixed with "-" (default -created_at)'
+        ),
     ],
     responses={
-        200: TorrentSerializer(many=True)
+        200: TorrentListSerializer(many=True)
     }
 )
 class TorrentListView(generics.ListAPIView):
     """List all available torrents with filtering options"""
 
-    serializer_class = TorrentSerializer
+    serializer_class = TorrentListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    paginate_by = 20
+    pagination_class = TorrentCursorPagination  # مرتب‌سازی order_by هم در pagination اعمال می‌شود
 
     def get_queryset(self):
-        queryset = Torrent.objects.filter(is_active=True)
+        queryset = annotate_age(Torrent.objects.filter(is_active=True))
 
         # فیلترها
         category = self.request.query_params.get('category')
         if category:
-            # Try to filter by category ID first, then by slug, then by name
-            try:
-                category_id = int(category)
-                queryset = queryset.filter(category_id=category_id)
-            except ValueError:
-                # Not a number, try slug or name
-                queryset = queryset.filter(
-                    Q(category__slug=category) | Q(category__name=category)
-                )
+            # ID, or otherwise slug/name
+            queryset = queryset.filter(category_lookup(category, 'category__'))
 
         search = self.request.query_params.get('search')
         if search:
+            # روی PostgreSQL از ایندکس‌های trigram (مایگریشن 0009) استفاده می‌شود
             queryset = queryset.filter(
                 Q(name__icontains=search) |
                 Q(description__icontains=search)
             )
 
-        # مرتب‌سازی
-        order_by = self.request.query_params.get('order_by', '-created_at')
-        if order_by in ['name', '-name', 'size', '-size', 'created_at', '-created_at']:
-            queryset = queryset.order_by(order_by)
-
-        return queryset
+        return torrent_list_values(queryset)
 
 
 class TorrentDetailView(generics.RetrieveAPIView):
@@ -81,7 +291,10 @@ class TorrentDetailView(generics.RetrieveAPIView):
 
     serializer_class = TorrentDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
-    queryset = Torrent.objects.filter(is_active=True)
+    # pieces_hash (تا صدها KB) فقط برای ساخت فایل تورنت لازم است
+    queryset = annotate_health(
+        Torrent.objects.filter(is_active=True)
+    ).select_related('created_by', 'category', 'stats').defer('pieces_hash')
     lookup_field = 'info_hash'
 
 
@@ -93,8 +306,12 @@ class TorrentStatsView(generics.RetrieveAPIView):
 
     def get_object(self):
         torrent_id = self.kwargs['info_hash']
-        torrent = get_object_or_404(Torrent, info_hash=torrent_id, is_active=True)
-        stats, created = TorrentStats.objects.get_or_create(torrent=torrent)
+        stats = TorrentStats.objects.select_related('torrent').filter(
+            torrent__info_hash=torrent_id, torrent__is_active=True
+        ).first()
+        if stats is None:
+            torrent = get_object_or_404(Torrent, info_hash=torrent_id, is_active=True)
+            stats, created = TorrentStats.objects.get_or_create(torrent=torrent)
         return stats
 
 
@@ -178,6 +395,10 @@ def upload_torrent(request):
         if not torrent_file:
             return Response({'error': 'No torrent file provided'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Validate size before reading the file into memory
+        if torrent_file.size > MAX_TORRENT_FILE_SIZE:
+            return Response({'error': 'Torrent file too large (max 10MB)'}, status=status.HTTP_400_BAD_REQUEST)
+
         # Validate file type
         if not torrent_file.name.endswith('.torrent'):
             return Response({'error': 'File must be a .torrent file'}, status=status.HTTP_400_BAD_REQUEST)
@@ -185,24 +406,15 @@ def upload_torrent(request):
         # Read and parse torrent file
         torrent_data = torrent_file.read()
 
-        # Parse bencoded data
+        # Calculate info hash over the original bytes of the info dict, before the full parse,
+        # so re-uploads of an existing torrent are answered without decoding the whole file
         try:
-            import bencode
-            torrent_dict = bencode.decode(torrent_data)
-        except ImportError:
-            return Response({'error': 'Bencode parsing not available'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            return Response({'error': f'Invalid torrent file: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Extract required information
-        if 'info' not in torrent_dict:
+            span = info_dict_span(torrent_data)
+        except (ValueError, IndexError):
+            return Response({'error': 'Invalid torrent file: malformed bencoded data'}, status=status.HTTP_400_BAD_REQUEST)
+        if span is None:
             return Response({'error': 'Invalid torrent file: missing info dictionary'}, status=status.HTTP_400_BAD_REQUEST)
-
-        info_dict = torrent_dict['info']
-
-        # Calculate info hash
-        import hashlib
-        info_hash = hashlib.sha1(bencode.encode(info_dict)).hexdigest()
+        info_hash = hashlib.sha1(memoryview(torrent_data)[span[0]:span[1]]).hexdigest()
 
         # Check if torrent already exists
         existing_torrent = Torrent.objects.filter(info_hash=info_hash).first()
@@ -216,7 +428,6 @@ def upload_torrent(request):
                 existing_torrent.save()
 
                 # Log reactivation
-                from logging_monitoring.models import SystemLog
                 SystemLog.objects.create(
                     category='torrent',
                     level='info',
@@ -241,106 +452,109 @@ def upload_torrent(request):
                     }
                 })
 
+        # Parse bencoded data (fastbencode, tolerant fallback for unsorted keys; keys stay bytes)
+        try:
+            torrent_dict = decode_torrent(torrent_data)
+        except Exception as e:
+            return Response({'error': f'Invalid torrent file: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Extract required information
+        if not isinstance(torrent_dict, dict) or not isinstance(torrent_dict.get(b'info'), dict):
+            return Response({'error': 'Invalid torrent file: missing info dictionary'}, status=status.HTTP_400_BAD_REQUEST)
+
+        info_dict = torrent_dict[b'info']
+
         # Extract metadata
-        name = info_dict.get('name', '').decode('utf-8') if isinstance(info_dict.get('name'), bytes) else info_dict.get('name', 'Unknown')
-        piece_length = info_dict.get('piece length', 0)
-        pieces = info_dict.get('pieces', b'')
+        name = bencode_text(info_dict, b'name', 'Unknown')
+        piece_length = info_dict.get(b'piece length', 0)
+        pieces = info_dict.get(b'pieces', b'')
         files_count = 1
 
         # Calculate total size
-        if 'files' in info_dict:
-            # Multi-file torrent
-            total_size = sum(file_info['length'] for file_info in info_dict['files'])
-            files_count = len(info_dict['files'])
+        if b'files' in info_dict:
+            # Multi-file torrent (map + itemgetter keeps the per-file loop in C)
+            files = info_dict[b'files']
+            try:
+                total_size = sum(map(itemgetter(b'length'), files))
+            except (KeyError, TypeError):
+                return Response({'error': 'Invalid torrent file: bad files list'}, status=status.HTTP_400_BAD_REQUEST)
+            files_count = len(files)
         else:
             # Single file torrent
-            total_size = info_dict.get('length', 0)
+            total_size = info_dict.get(b'length', 0)
 
         # Get form data
         description = request.POST.get('description', '')
         category_input = request.POST.get('category')
         category = None
         if category_input:
-            try:
-                # Try to get category by ID first
-                category_id = int(category_input)
-                category = Category.objects.get(id=category_id, is_active=True)
-            except (ValueError, Category.DoesNotExist):
-                # Try to get category by slug or name
-                try:
-                    category = Category.objects.get(
-                        Q(slug=category_input) | Q(name=category_input),
-                        is_active=True
-                    )
-                except Category.DoesNotExist:
-                    # Invalid category, set to None
-                    pass
+            # Match by ID wins over a numeric slug/name; invalid category, set to None
+            categories = Category.objects.filter(category_lookup(category_input), is_active=True)
+            if category_input.isdigit():
+                categories = categories.order_by(Case(When(id=int(category_input), then=Value(0)), default=Value(1)))
+            category = categories.first()
 
         is_private = request.POST.get('is_private', 'false').lower() == 'true'
 
-        # Create torrent record
-        torrent = Torrent.objects.create(
-            info_hash=info_hash,
-            name=name,
-            description=description,
-            size=total_size,
-            files_count=files_count,
-            created_by=request.user,
-            is_active=True,
-            is_private=is_private,
-            category=category,
-            piece_length=piece_length,
-            pieces_hash=pieces.hex() if pieces else '',
-            announce_url=torrent_dict.get('announce', '').decode('utf-8') if isinstance(torrent_dict.get('announce'), bytes) else torrent_dict.get('announce', ''),
-            comment=info_dict.get('comment', '').decode('utf-8') if isinstance(info_dict.get('comment'), bytes) else info_dict.get('comment', ''),
-            created_by_client=request.POST.get('created_by_client', ''),
-            tags=request.POST.getlist('tags', [])
-        )
-
-        # Create initial stats
-        from .models import TorrentStats
-        TorrentStats.objects.create(torrent=torrent)
-
-        # Award upload credits
-        from credits.models import CreditTransaction
-        from django.conf import settings
-        from decimal import Decimal
+        # Torrent, stats, credit and audit rows commit together in one transaction
+        with transaction.atomic():
+            # Create torrent record
+            torrent = Torrent.objects.create(
+                info_hash=info_hash,
+                name=name,
+                description=description,
+                size=total_size,
+                files_count=files_count,
+                created_by=request.user,
+                is_active=True,
+                is_private=is_private,
+                category=category,
+                piece_length=piece_length,
+                pieces_hash=pieces or b'',
+                announce_url=bencode_text(torrent_dict, b'announce'),
+                comment=bencode_text(info_dict, b'comment'),
+                created_by_client=request.POST.get('created_by_client', ''),
+                tags=request.POST.getlist('tags', [])
+            )
 
-        # Calculate credits based on torrent size
-        # 1 credit per GB uploaded
-        torrent_size_gb = Decimal(total_size) / Decimal(1024 ** 3)
-        multiplier = Decimal(str(getattr(settings, 'BITTORRENT_SETTINGS', {}).get('UPLOAD_CREDIT_MULTIPLIER', 1.0)))
-        upload_credits = (torrent_size_gb * multiplier).quantize(Decimal('0.01'))  # Round to 2 decimal places
+            # Create initial stats
+            TorrentStats.objects.create(torrent=torrent)
+
+            # Award upload credits
+            # Calculate credits based on torrent size
+            # 1 credit per GB uploaded
+            torrent_size_gb = Decimal(total_size) / BYTES_PER_GB
+            multiplier = Decimal(str(getattr(settings, 'BITTORRENT_SETTINGS', {}).get('UPLOAD_CREDIT_MULTIPLIER', 1.0)))
+            upload_credits = (torrent_size_gb * multiplier).quantize(CREDIT_QUANTUM)  # Round to 2 decimal places
+
+            if upload_credits > 0:
+                CreditTransaction.objects.create(
+                    user=request.user,
+                    torrent=torrent,
+                    transaction_type='upload',
+                    amount=upload_credits,
+                    description=f'Upload credit for torrent: {name} ({torrent_size_gb:.2f} GB)'
+                )
 
-        if upload_credits > 0:
-            CreditTransaction.objects.create(
+            # Log the upload
+            UserActivity.objects.create(
                 user=request.user,
-                torrent=torrent,
-                transaction_type='upload',
-                amount=upload_credits,
-                description=f'Upload credit for torrent: {name} ({torrent_size_gb:.2f} GB)'
+                activity_type='torrent_upload',
+                description=f'Uploaded torrent: {name} (+{upload_credits:.2f} credits)',
+                ip_address=get_client_ip(request),
+                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                details={'torrent_id': torrent.id, 'info_hash': info_hash, 'credits_earned': str(upload_credits)}
             )
 
-        # Log the upload
-        from logging_monitoring.models import UserActivity, SystemLog
-        UserActivity.objects.create(
-            user=request.user,
-            activity_type='torrent_upload',
-            description=f'Uploaded torrent: {name} (+{upload_credits:.2f} credits)',
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-            details={'torrent_id': torrent.id, 'info_hash': info_hash, 'credits_earned': upload_credits}
-        )
-
-        SystemLog.objects.create(
-            category='tracker',
-            level='info',
-            message=f'User {request.user.username} uploaded torrent: {name} (+{upload_credits:.2f} credits)',
-            user=request.user,
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-            details={'torrent_id': torrent.id, 'size': total_size, 'credits_earned': upload_credits}
-        )
+            SystemLog.objects.create(
+                category='tracker',
+                level='info',
+                message=f'User {request.user.username} uploaded torrent: {name} (+{upload_credits:.2f} credits)',
+                user=request.user,
+                ip_address=get_client_ip(request),
+                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                details={'torrent_id': torrent.id, 'size': total_size, 'credits_earned': str(upload_credits)}
+            )
 
         return Response({
             'message': 'Torrent uploaded successfully',
@@ -349,14 +563,13 @@ def upload_torrent(request):
                 'info_hash': torrent.info_hash,
                 'name': torrent.name,
                 'size': torrent.size,
-                'category': torrent.category,
+                'category': torrent.category_id,
                 'is_private': torrent.is_private
             }
         }, status=status.HTTP_201_CREATED)
 
     except Exception as e:
         # Log error
-        from logging_monitoring.models import SystemLog
         SystemLog.objects.create(
             category='tracker',
             level='error',
@@ -377,18 +590,21 @@ def upload_torrent(request):
 def torrent_categories(request):
     """دریافت لیست دسته‌بندی‌های تورنت با تعداد تورنت‌های هر دسته"""
 
-    # Get all active categories with torrent counts
-    categories_with_counts = Category.objects.filter(
-        is_active=True
-    ).annotate(
-        count=Count('torrents', filter=Q(torrents__is_active=True))
-    ).values(
-        'id', 'name', 'slug', 'description', 'icon', 'color', 'count'
-    ).order_by('sort_order')
-
+    def compute():
+        # Get all active categories with torrent counts
+        return list(Category.objects.filter(
+            is_active=True
+        ).annotate(
+            count=Count('torrents', filter=Q(torrents__is_active=True))
+        ).values(
+            'id', 'name', 'slug', 'description', 'icon', 'color', 'count'
+        ).order_by('sort_order'))
+
+    # aggregate روی کل جدول تورنت‌ها فقط پس از تغییر داده‌ها دوباره اجرا می‌شود (torrents/signals.py)
+    categories = cache.get_or_set(CATEGORIES_CACHE_KEY, compute, CATEGORIES_CACHE_TIMEOUT)
     return Response({
-        'categories': list(categories_with_counts),
-        'total_categories': len(categories_with_counts)
+        'categories': categories,
+        'total_categories': len(categories)
     })
 
 
@@ -412,16 +628,16 @@ def torrent_popular(request):
     """دریافت تورنت‌های محبوب"""
 
     # تورنت‌هایی با بیشترین peerها در ۲۴ ساعت گذشته
-    popular_torrents = Torrent.objects.filter(
+    # cutoff یک بار محاسبه می‌شود تا filter و Count دقیقاً یک مرز زمانی داشته باشند
+    cutoff = timezone.now() - timezone.timedelta(hours=24)
+    popular_torrents = torrent_list_values(annotate_age(Torrent.objects.filter(
         is_active=True,
-        peers__last_announced__gte=timezone.now() - timezone.timedelta(hours=24)
+        peers__last_announced__gte=cutoff
     ).annotate(
-        active_peers=Count('peers', filter=Q(
-            peers__last_announced__gte=timezone.now() - timezone.timedelta(hours=24)
-        ))
-    ).order_by('-active_peers')[:20]
+        active_peers=Count('peers', filter=Q(peers__last_announced__gte=cutoff))
+    ))).order_by('-active_peers')[:20]
 
-    serializer = TorrentSerializer(popular_torrents, many=True)
+    serializer = TorrentListSerializer(popular_torrents, many=True)
     return Response({
         'popular_torrents': serializer.data
     })
@@ -432,12 +648,12 @@ def torrent_popular(request):
 def user_torrents(request):
     """دریافت تورنت‌های کاربر"""
 
-    user_torrents = Torrent.objects.filter(
+    user_torrents = torrent_list_values(annotate_age(Torrent.objects.filter(
         created_by=request.user,
         is_active=True
-    ).order_by('-created_at')
+    ))).order_by('-created_at')
 
-    serializer = TorrentSerializer(user_torrents, many=True)
+    serializer = TorrentListSerializer(user_torrents, many=True)
     return Response({
         'user_torrents': serializer.data
     })
@@ -462,7 +678,6 @@ def delete_torrent(request, info_hash):
     torrent.save()
 
     # لاگ حذف
-    from logging_monitoring.models import SystemLog
     SystemLog.objects.create(
         category='admin',
         level='info',
@@ -496,10 +711,16 @@ def torrent_peers(request, info_hash):
         )
 
     # peerهای فعال (۲۴ ساعت گذشته)
-    active_peers = Peer.objects.filter(
+    since = timezone.now() - timezone.timedelta(hours=24)
+    active_peers = list(annotate_progress(Peer.objects.filter(
         torrent=torrent,
-        last_announced__gte=timezone.now() - timezone.timedelta(hours=24)
-    ).order_by('-last_announced')
+        last_announced__gte=since
+    )).select_related('user').order_by('-last_announced'))
+
+    # سرعت‌ها با یک کوئری روی AnnounceLog
+    speeds = peer_speeds(torrent, since)
+    for peer in active_peers:
+        peer.download_speed, peer.upload_speed = speeds.get(peer.peer_id, (0, 0))
 
     serializer = PeerSerializer(active_peers, many=True)
     return Response({
@@ -513,35 +734,22 @@ def torrent_peers(request, info_hash):
 def torrent_health(request, info_hash):
     """بررسی سلامت تورنت"""
 
-    torrent = get_object_or_404(Torrent, info_hash=info_hash, is_active=True)
-
-    try:
-        stats = torrent.stats
-        seeders = stats.seeders
-        leechers = stats.leechers
-    except TorrentStats.DoesNotExist:
-        seeders = 0
-        leechers = 0
-
-    # محاسبه نسبت سلامت
-    total_peers = seeders + leechers
-    if total_peers == 0:
-        health_score = 0
-        health_status = 'dead'
-    elif seeders >= leechers:
-        health_score = min(100, (seeders / max(1, leechers)) * 50)
-        health_status = 'excellent' if health_score >= 80 else 'good'
-    else:
-        health_score = max(0, 50 - (leechers / max(1, seeders)) * 25)
-        health_status = 'poor' if health_score < 30 else 'fair'
+    # محاسبه نسبت سلامت در دیتابیس
+    torrent = get_object_or_404(
+        annotate_health(Torrent.objects.only('name', 'seeders', 'leechers')),
+        info_hash=info_hash,
+        is_active=True
+    )
+    seeders = torrent.seeders
+    leechers = torrent.leechers
 
     return Response({
         'torrent': torrent.name,
-        'health_score': round(health_score, 1),
-        'health_status': health_status,
+        'health_score': torrent.health_score,
+        'health_status': torrent.health_status,
         'seeders': seeders,
         'leechers': leechers,
-        'total_peers': total_peers
+        'total_peers': seeders + leechers
     })
 
 
@@ -560,30 +768,38 @@ def download_torrent(request, info_hash):
             return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
         return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
 
+    # فایل تورنت تابعی خالص از ردیف تورنت است؛ updated_at نسخه آن را مشخص می‌کند
+    version = f'{info_hash}:{torrent.updated_at.timestamp()}'
+    etag = f'"{hashlib.sha1(version.encode()).hexdigest()}"'
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+
     try:
-        # Generate torrent file data
-        torrent_data = generate_torrent_file(torrent)
+        # Generate torrent file data (cached per row version, so saves invalidate it)
+        torrent_data = cache.get_or_set(f'torrent:file:{version}', lambda: generate_torrent_file(torrent), 3600)
 
-        # Log the download
+        # Log the download (written by a Celery worker, off the request path; broker errors are only logged)
         if request.user.is_authenticated:
-            from logging_monitoring.models import UserActivity
-            UserActivity.objects.create(
-                user=request.user,
+            enqueue_task(
+                record_user_activity,
+                user_id=request.user.id,
                 activity_type='torrent_download',
                 description=f'Downloaded torrent: {torrent.name}',
                 ip_address=get_client_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                details={'torrent_id': torrent.id, 'info_hash': info_hash}
+                details={'torrent_id': torrent.id, 'info_hash': info_hash},
+                timestamp=timezone.now().isoformat()
             )
 
         # Return torrent file
-        from django.http import HttpResponse
         response = HttpResponse(torrent_data, content_type='application/x-bittorrent')
         response['Content-Disposition'] = f'attachment; filename="{torrent.name}.torrent"'
+        response['ETag'] = etag
         return response
 
     except Exception as e:
-        from logging_monitoring.models import SystemLog
         SystemLog.objects.create(
             category='tracker',
             level='error',
@@ -599,56 +815,50 @@ def download_torrent(request, info_hash):
 
 def generate_torrent_file(torrent):
     """Generate torrent file data from database"""
-    import bencode
-    from django.conf import settings
-
     # Build info dictionary
     info_dict = {
-        'name': torrent.name.encode('utf-8'),
-        'piece length': torrent.piece_length or 262144,  # Default 256KB
+        b'name': torrent.name.encode('utf-8'),
+        b'piece length': torrent.piece_length or 262144,  # Default 256KB
     }
 
     # Add pieces if available
     if torrent.pieces_hash:
-        try:
-            info_dict['pieces'] = bytes.fromhex(torrent.pieces_hash)
-        except:
-            pass
+        info_dict[b'pieces'] = bytes(torrent.pieces_hash)
 
     # Add files information
     if torrent.files_count > 1:
         # Multi-file torrent (simplified - would need proper file structure)
-        info_dict['files'] = [{
-            'path': [torrent.name.encode('utf-8')],
-            'length': torrent.size
+        info_dict[b'files'] = [{
+            b'path': [torrent.name.encode('utf-8')],
+            b'length': torrent.size
         }]
     else:
         # Single file torrent
-        info_dict['length'] = torrent.size
+        info_dict[b'length'] = torrent.size
 
     # Add optional fields
     if torrent.comment:
-        info_dict['comment'] = torrent.comment.encode('utf-8')
+        info_dict[b'comment'] = torrent.comment.encode('utf-8')
 
     if torrent.created_by_client:
-        info_dict['created by'] = torrent.created_by_client.encode('utf-8')
+        info_dict[b'created by'] = torrent.created_by_client.encode('utf-8')
 
     # Build main torrent dictionary
     torrent_dict = {
-        'info': info_dict,
-        'creation date': int(torrent.created_at.timestamp()),
+        b'info': info_dict,
+        b'creation date': int(torrent.created_at.timestamp()),
     }
 
     # Add announce URL
     if torrent.announce_url:
-        torrent_dict['announce'] = torrent.announce_url.encode('utf-8')
+        torrent_dict[b'announce'] = torrent.announce_url.encode('utf-8')
     else:
         # Use default tracker URL
         site_url = getattr(settings, 'SITE_URL', 'http://localhost:8000')
-        torrent_dict['announce'] = f"{site_url}/announce".encode('utf-8')
+        torrent_dict[b'announce'] = f"{site_url}/announce".encode('utf-8')
 
     # Add comment
     if torrent.comment:
-        torrent_dict['comment'] = torrent.comment.encode('utf-8')
+        torrent_dict[b'comment'] = torrent.comment.encode('utf-8')
 
-    return bencode.encode(torrent_dict)
\ No newline at end of file
+    return bencode(torrent_dict)
\ No newline at end of file
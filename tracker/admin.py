@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
-from django.db.models import Count, Sum, Avg
+from django.db.models import Count, Sum, Avg, Exists, OuterRef
 from django.utils import timezone
 from datetime import timedelta
 
@@ -115,12 +115,18 @@ class TrackerAdminSite(admin.AdminSite):
         last_hour = timezone.now() - timedelta(hours=1)
         context['recent_announces'] = AnnounceLog.objects.filter(timestamp__gte=last_hour).count()
         context['active_peers'] = Peer.objects.filter(last_announced__gte=last_hour).count()
-        context['active_torrents'] = Torrent.objects.filter(peers__last_announced__gte=last_hour).distinct().count()
+        # EXISTS روی ایندکس (torrent, last_announced) به جای join کامل و COUNT(DISTINCT)
+        context['active_torrents'] = Torrent.objects.filter(
+            Exists(Peer.objects.filter(torrent=OuterRef('pk'), last_announced__gte=last_hour))
+        ).count()
 
         # Top torrents by activity
-        context['top_torrents'] = Torrent.objects.annotate(
-            recent_announces=Count('announcelog', filter=AnnounceLog.objects.filter(timestamp__gte=last_hour))
-        ).filter(recent_announces__gt=0).order_by('-recent_announces')[:10]
+        # filter قبل از annotate، join را به announceهای ساعت اخیر محدود می‌کند
+        context['top_torrents'] = Torrent.objects.filter(
+            announce_logs__timestamp__gte=last_hour
+        ).annotate(
+            recent_announces=Count('announce_logs')
+        ).order_by('-recent_announces')[:10]
 
         # System health
         context['total_torrents'] = Torrent.objects.count()
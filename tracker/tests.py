@@ -1,5 +1,5 @@
 import bencode
-from django.test import TestCase, Client, override_settings
+from django.test import TestCase, Client, RequestFactory, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
@@ -12,6 +12,11 @@ from logging_monitoring.models import SystemLog
 from credits.models import CreditTransaction
 from decimal import Decimal
 
+from .views import (
+    encode_announce, encode_dict_peers, get_announce_torrent, get_client_ip, get_peer_list, process_announce,
+    validate_announce_params, validate_auth_token
+)
+
 User = get_user_model()
 
 
@@ -66,7 +71,9 @@ class TrackerViewsTestCase(TestCase):
             'auth_token': self.auth_token.token
         }
 
-        response = self.client.get(announce_url, params)
+        # AnnounceLog is queued with transaction.on_commit
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(announce_url, params)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'text/plain')
 
@@ -81,10 +88,77 @@ class TrackerViewsTestCase(TestCase):
         self.assertEqual(peer.port, 6881)
         self.assertEqual(peer.uploaded, 1024)
 
+        # Verify peer counts were denormalized onto the torrent
+        self.torrent.refresh_from_db()
+        self.assertEqual((self.torrent.seeders, self.torrent.leechers), (0, 1))
+
         # Verify announce log was created
         announce_log = AnnounceLog.objects.get(user=self.user, torrent=self.torrent)
         self.assertEqual(announce_log.event, 'started')
 
+    def test_announce_survives_broker_errors(self):
+        """Test a failure to queue the announce log is logged instead of failing the announce"""
+        params = {
+            'info_hash': 'aabbccddeeff00112233445566778899aabbccdd',
+            'peer_id': '-qB0001-testpeerid12',
+            'port': '6881',
+            'uploaded': '0',
+            'downloaded': '0',
+            'left': '2048',
+            'compact': '1',
+            'event': 'started',
+            'auth_token': self.auth_token.token
+        }
+
+        with patch('tracker.views.record_announce_log.delay', side_effect=OSError('broker down')) as delay:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                response = self.client.get(reverse('tracker:announce'), params)
+        self.assertEqual(len(callbacks), 1)
+        delay.assert_called_once()
+        self.assertIn('interval', bencode.decode(response.content))
+        self.assertFalse(AnnounceLog.objects.exists())
+
+    def test_announce_percent_encoded_info_hash(self):
+        """Test a percent-encoded binary info_hash is recovered from the raw query string"""
+        raw_hash = bytes.fromhex(self.torrent.info_hash)
+        query = '&'.join([
+            'info_hash=' + ''.join('%%%02X' % b for b in raw_hash),
+            'peer_id=-qB0001-testpeerid12',
+            'port=6881',
+            'uploaded=0',
+            'downloaded=0',
+            'left=0',
+            'compact=1',
+            'event=started',
+            'auth_token=' + self.auth_token.token,
+        ])
+
+        response = self.client.get(reverse('tracker:announce') + '?' + query)
+        self.assertNotIn('failure reason', bencode.decode(response.content))
+        self.assertTrue(Peer.objects.filter(torrent=self.torrent, user=self.user).exists())
+
+    def test_regular_announce_stats_refresh_is_throttled(self):
+        """Test event-less announces recount torrent stats at most once per interval"""
+        params = {
+            'info_hash': 'aabbccddeeff00112233445566778899aabbccdd',
+            'peer_id': '-qB0001-testpeerid12',
+            'port': '6881',
+            'uploaded': '0',
+            'downloaded': '0',
+            'left': '2048',
+            'compact': '1',
+            'event': '',
+            'auth_token': self.auth_token.token
+        }
+
+        with patch('tracker.views.update_torrent_stats') as update_stats:
+            self.client.get(reverse('tracker:announce'), params)
+            self.client.get(reverse('tracker:announce'), params)
+            self.assertEqual(update_stats.call_count, 1)
+
+            self.client.get(reverse('tracker:announce'), {**params, 'event': 'stopped'})
+            self.assertEqual(update_stats.call_count, 2)
+
     def test_announce_invalid_token(self):
         """Test announce with invalid token"""
         announce_url = reverse('tracker:announce')
@@ -201,6 +275,40 @@ class TrackerViewsTestCase(TestCase):
         self.assertIn('failure reason', response_data)
         self.assertEqual(response_data['failure reason'], 'Invalid port number')
 
+    def test_announce_invalid_event(self):
+        """Test announce with an unknown event"""
+        announce_url = reverse('tracker:announce')
+        params = {
+            'info_hash': 'aabbccddeeff00112233445566778899aabbccdd',
+            'peer_id': '-qB0001-testpeerid12',
+            'port': '6881',
+            'uploaded': '1024',
+            'downloaded': '512',
+            'left': '2048',
+            'compact': '1',
+            'event': 'exploded',
+            'auth_token': self.auth_token.token
+        }
+
+        response = self.client.get(announce_url, params)
+        response_data = bencode.decode(response.content)
+        self.assertEqual(response_data['failure reason'], 'Invalid event')
+
+    def test_validate_params_accepts_known_events(self):
+        """Test every supported event, including a regular announce, passes validation"""
+        for event in ('started', 'stopped', 'completed', 'update', 'paused', ''):
+            params = {
+                'info_hash': 'aabbccddeeff00112233445566778899aabbccdd',
+                'peer_id': '-qB0001-testpeerid12',
+                'port': '6881',
+                'uploaded': '0',
+                'downloaded': '0',
+                'left': '0',
+                'compact': '1',
+                'event': event
+            }
+            self.assertEqual(validate_announce_params(params), (True, 'OK'))
+
     def test_announce_torrent_not_found(self):
         """Test announce for non-existent torrent"""
         announce_url = reverse('tracker:announce')
@@ -338,6 +446,7 @@ class TrackerViewsTestCase(TestCase):
         self.assertIn('peers', response_data)
         # Compact format returns bytes
         self.assertIsInstance(response_data['peers'], bytes)
+        self.assertEqual(response_data['peers'], bytes([192, 168, 1, 2]) + (6882).to_bytes(2, 'big'))
 
         # Test dictionary format
         params_dict = params_compact.copy()
@@ -349,6 +458,135 @@ class TrackerViewsTestCase(TestCase):
         # Dictionary format returns list
         self.assertIsInstance(response_data['peers'], list)
 
+    def test_compact_peer_list_skips_non_ipv4(self):
+        """Test compact peer lists pack 6 bytes per IPv4 peer and skip IPv6 peers"""
+        for index, ip_address in enumerate(['10.0.0.1', '2001:db8::1', '10.0.0.2']):
+            Peer.objects.create(
+                torrent=self.torrent,
+                peer_id=f'-qB0001-compactpeer{index}',
+                ip_address=ip_address,
+                port=6881 + index,
+                left=0
+            )
+
+        peers = get_peer_list(self.torrent, '-qB0001-testpeerid12', 50, compact=True)
+        self.assertEqual(len(peers), 12)
+        self.assertIn(bytes([10, 0, 0, 1]) + (6881).to_bytes(2, 'big'), peers)
+        self.assertIn(bytes([10, 0, 0, 2]) + (6883).to_bytes(2, 'big'), peers)
+
+    def test_announce_encoding_matches_bencode(self):
+        """Test the fixed-layout announce writers match generic bencode output"""
+        peers = bytes([10, 0, 0, 1]) + (6881).to_bytes(2, 'big')
+        self.assertEqual(
+            encode_announce(1800, 300, b'6:' + peers),
+            bencode.encode({'interval': 1800, 'min interval': 300, 'peers': peers})
+        )
+        self.assertEqual(
+            encode_announce(1800, 300, b'0:', complete=3),
+            bencode.encode({'interval': 1800, 'min interval': 300, 'peers': b'', 'complete': 3})
+        )
+
+        dict_peers = [
+            {'ip': '10.0.0.1', 'port': 6881, 'peer id': '-qB0001-testpeerid12'},
+            {'ip': '2001:db8::1', 'port': 51413, 'peer id': '-TR2940-abcdefghijkl'},
+        ]
+        self.assertEqual(
+            encode_dict_peers((peer['ip'], peer['port'], peer['peer id']) for peer in dict_peers),
+            bencode.encode(dict_peers)
+        )
+        self.assertEqual(encode_dict_peers([]), bencode.encode([]))
+
+    def test_peer_list_samples_numwant_peers(self):
+        """Test peer lists return a random subset of numwant active peers"""
+        for index in range(10):
+            Peer.objects.create(
+                torrent=self.torrent,
+                peer_id=f'-qB0001-samplepeer{index:02d}',
+                ip_address=f'10.0.1.{index + 1}',
+                port=6881,
+                left=0
+            )
+
+        peers = get_peer_list(self.torrent, '-qB0001-testpeerid12', 4, compact=True)
+        self.assertEqual(len(peers), 24)
+        peers = get_peer_list(self.torrent, '-qB0001-testpeerid12', 4)
+        self.assertEqual(len({peer_id for _, _, peer_id in peers}), 4)
+
+    def test_peer_compact_address_follows_ip_updates(self):
+        """Test the stored compact address is refreshed when ip/port are saved"""
+        peer = Peer.objects.create(
+            torrent=self.torrent,
+            peer_id='-qB0001-compactpeerX',
+            ip_address='10.0.0.1',
+            port=6881,
+            left=0
+        )
+        self.assertEqual(bytes(peer.compact_address), bytes([10, 0, 0, 1, 0x1a, 0xe1]))
+
+        peer.ip_address = '2001:db8::1'
+        peer.save(update_fields=['ip_address'])
+        peer.refresh_from_db()
+        self.assertEqual(bytes(peer.compact_address), b'')
+
+    def test_anonymous_announce_tolerates_duplicate_peer_rows(self):
+        """Test anonymous announces keep working when (torrent, peer_id) has duplicate rows"""
+        for _ in range(2):
+            Peer.objects.create(
+                torrent=self.torrent,
+                peer_id='-qB0001-anonymouspr1',
+                ip_address='10.0.0.9',
+                port=6881,
+                left=1024
+            )
+        params = {
+            'info_hash': self.torrent.info_hash,
+            'peer_id': '-qB0001-anonymouspr1',
+            'port': '6881',
+            'uploaded': '0',
+            'downloaded': '0',
+            'left': '512',
+            'compact': '1',
+            'event': ''
+        }
+        validate_announce_params(params)
+        with patch('tracker.views.record_announce_log.delay'):
+            response = process_announce(None, self.torrent, params, '10.0.0.9', 'test-client')
+        self.assertIn(b'interval', response.content)
+        self.assertEqual(Peer.objects.filter(torrent=self.torrent, peer_id='-qB0001-anonymouspr1').count(), 2)
+
+    def test_validate_params_converts_raw_info_hash(self):
+        """Test a 20-character raw info_hash is rewritten to lowercase hex"""
+        params = {
+            'info_hash': 'ABCDEFGHIJKLMNOPQRST',
+            'peer_id': '-qB0001-testpeerid12',
+            'port': '6881',
+            'uploaded': '0',
+            'downloaded': '0',
+            'left': '0',
+            'compact': '1',
+            'event': 'started'
+        }
+        self.assertEqual(validate_announce_params(params), (True, 'OK'))
+        self.assertEqual(params['info_hash'], b'ABCDEFGHIJKLMNOPQRST'.hex())
+        self.assertEqual((params['port'], params['uploaded'], params['left']), (6881, 0, 0))
+        self.assertEqual(params['numwant'], 50)
+
+        for numwant, expected in (('abc', 50), ('-5', 50), ('500', 100), ('0', 0)):
+            params['numwant'] = numwant
+            validate_announce_params(params)
+            self.assertEqual(params['numwant'], expected)
+
+    def test_announce_torrent_cached_until_saved(self):
+        """Test announce torrent lookups are cached and invalidated when the torrent changes"""
+        self.assertEqual(get_announce_torrent(self.torrent.info_hash).pk, self.torrent.pk)
+        with self.assertNumQueries(0):
+            torrent = get_announce_torrent(self.torrent.info_hash)
+        self.assertTrue(torrent.is_active)
+
+        self.torrent.is_private = False
+        self.torrent.save()
+        self.assertFalse(get_announce_torrent(self.torrent.info_hash).is_private)
+
     def test_scrape_endpoint(self):
         """Test basic scrape endpoint"""
         scrape_url = reverse('tracker:scrape')
@@ -387,6 +625,34 @@ class TrackerViewsTestCase(TestCase):
         self.assertIn('files', response_data)
         self.assertEqual(len(response_data['files']), 2)
 
+    def test_scrape_entries_cached_per_info_hash(self):
+        """Test scrape serves per-torrent stats from cache within the TTL window"""
+        scrape_url = reverse('tracker:scrape')
+        params = {
+            'info_hash': 'aabbccddeeff00112233445566778899aabbccdd',
+            'auth_token': self.auth_token.token
+        }
+        TorrentStats.objects.filter(pk=self.torrent_stats.pk).update(seeders=3, completed=5, leechers=2)
+        expected = {'complete': 3, 'downloaded': 5, 'incomplete': 2}
+
+        response = self.client.get(scrape_url, params)
+        files = bencode.decode(response.content)['files']
+        self.assertEqual(dict(files['AABBCCDDEEFF00112233445566778899AABBCCDD']), expected)
+
+        TorrentStats.objects.filter(pk=self.torrent_stats.pk).update(seeders=99)
+        response = self.client.get(scrape_url, params)
+        files = bencode.decode(response.content)['files']
+        self.assertEqual(dict(files['AABBCCDDEEFF00112233445566778899AABBCCDD']), expected)
+
+    def test_scrape_percent_encoded_info_hash(self):
+        """Test scrape accepts a percent-encoded binary info_hash"""
+        raw_hash = bytes.fromhex(self.torrent.info_hash)
+        query = 'info_hash=%s&auth_token=%s' % (''.join('%%%02X' % b for b in raw_hash), self.auth_token.token)
+
+        response = self.client.get(reverse('tracker:scrape') + '?' + query)
+        files = bencode.decode(response.content)['files']
+        self.assertEqual(list(files), [self.torrent.info_hash.upper()])
+
     def test_scrape_all_torrents(self):
         """Test scrape without specific info hashes"""
         scrape_url = reverse('tracker:scrape')
@@ -398,6 +664,27 @@ class TrackerViewsTestCase(TestCase):
         response_data = bencode.decode(response.content)
         self.assertIn('files', response_data)
 
+    def test_scrape_all_torrents_sorted_and_cached(self):
+        """Test a full scrape lists every active torrent in key order and is cached briefly"""
+        torrent2 = Torrent.objects.create(
+            info_hash='0011223344556677889900112233445566778899',
+            name='Test Torrent 2',
+            size=1024,
+            created_by=self.user,
+            is_active=True
+        )
+        scrape_url = reverse('tracker:scrape')
+        params = {'auth_token': self.auth_token.token}
+
+        response = self.client.get(scrape_url, params)
+        files = bencode.decode(response.content)['files']
+        self.assertEqual(list(files), [torrent2.info_hash.upper(), self.torrent.info_hash.upper()])
+        self.assertEqual(dict(files[torrent2.info_hash.upper()]), {'complete': 0, 'downloaded': 0, 'incomplete': 0})
+
+        torrent2.delete()
+        response = self.client.get(scrape_url, params)
+        self.assertEqual(len(bencode.decode(response.content)['files']), 2)
+
     def test_scrape_invalid_token(self):
         """Test scrape with invalid token"""
         scrape_url = reverse('tracker:scrape')
@@ -410,6 +697,32 @@ class TrackerViewsTestCase(TestCase):
         response_data = bencode.decode(response.content)
         self.assertIn('failure reason', response_data)
 
+    def test_client_ip_unwraps_ipv4_mapped_addresses(self):
+        """Test IPv4-mapped IPv6 and padded X-Forwarded-For addresses are normalized"""
+        factory = RequestFactory()
+        self.assertEqual(get_client_ip(factory.get('/', REMOTE_ADDR='::ffff:10.0.0.7')), '10.0.0.7')
+        self.assertEqual(get_client_ip(factory.get('/', REMOTE_ADDR='2001:db8::1')), '2001:db8::1')
+        self.assertEqual(
+            get_client_ip(factory.get('/', HTTP_X_FORWARDED_FOR=' 10.0.0.8 , 10.0.0.1')),
+            '10.0.0.8'
+        )
+
+    def test_auth_token_last_used_write_is_debounced(self):
+        """Test last_used is written on first use and skipped for rapid repeat requests"""
+        request = RequestFactory().get(reverse('tracker:scrape'), {'auth_token': self.auth_token.token})
+
+        user, message = validate_auth_token(request, self.torrent.info_hash)
+        self.assertEqual((user, message), (self.user, 'OK'))
+        self.auth_token.refresh_from_db()
+        first_used = self.auth_token.last_used
+        self.assertIsNotNone(first_used)
+
+        # Only the token lookup runs; the recent last_used is not rewritten
+        with self.assertNumQueries(1):
+            validate_auth_token(request, self.torrent.info_hash)
+        self.auth_token.refresh_from_db()
+        self.assertEqual(self.auth_token.last_used, first_used)
+
     def test_announce_credit_transaction(self):
         """Test credit transaction creation on upload"""
         # Set initial credit
@@ -459,6 +772,11 @@ class TrackerViewsTestCase(TestCase):
         self.assertIsNotNone(credit_tx)
         self.assertGreater(credit_tx.amount, 0)
 
+        # Lifetime upload and credit are persisted together
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.lifetime_upload, 104857600 - 1024)
+        self.assertGreater(self.user.total_credit, Decimal('5.0'))
+
     def test_announce_suspicious_activity_detection(self):
         """Test suspicious activity detection"""
         announce_url = reverse('tracker:announce')
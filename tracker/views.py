@@ -1,12 +1,17 @@
 import hashlib
 import hmac
+import logging
+import random
+import re
 import secrets
-from urllib.parse import unquote
+from functools import partial
+from urllib.parse import parse_qsl
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Count, Q
 from django.conf import settings
 from django.core.cache import cache
 from rest_framework.decorators import api_view, permission_classes
@@ -14,40 +19,90 @@ from rest_framework.permissions import AllowAny
 import bencode
 
 from security.models import AnnounceLog
+from security.tasks import record_announce_log
+from utils.helpers import enqueue_task
 from torrents.models import Torrent, Peer, TorrentStats
+from torrents.signals import TRACKER_TORRENT_CACHE_KEY, TRACKER_TORRENT_CACHE_TIMEOUT
 from accounts.models import User, AuthToken
 from credits.models import CreditTransaction
 from security.models import SuspiciousActivity, RateLimit, IPBlock
 from logging_monitoring.models import SystemLog
 from credits.models import CreditTransaction
 
+HEX_INFO_HASH = re.compile(r'[0-9a-fA-F]{40}')
+
+# قطعه bencoded آمار scrape هر تورنت برای مدت کوتاهی کش می‌شود
+SCRAPE_ENTRY_CACHE_KEY = 'tracker:scrape:{}'
+SCRAPE_ENTRY_CACHE_TIMEOUT = 30
+SCRAPE_ALL_CACHE_KEY = 'tracker:scrape:all'
+
+# حداکثر تعداد peer فعالی که برای نمونه‌گیری پاسخ announce خوانده می‌شود
+PEER_SAMPLE_POOL = 1000
+
+# announceهای بدون این eventها شمارش seeder/leecher را حداکثر یک بار در هر بازه تکرار می‌کنند
+STATS_CHANGING_EVENTS = frozenset({'started', 'stopped', 'completed'})
+STATS_REFRESH_KEY = 'tracker:stats_refresh:{}'
+STATS_REFRESH_INTERVAL = 30
+
+# پارامترهای الزامی و eventهای مجاز announce
+REQUIRED_ANNOUNCE_PARAMS = ('info_hash', 'peer_id', 'port', 'uploaded', 'downloaded', 'left', 'compact', 'event')
+ANNOUNCE_EVENTS = frozenset({'started', 'stopped', 'completed', 'update', 'paused', ''})
+
+# پارامترهای عددی announce که باید غیرمنفی باشند
+COUNTER_PARAMS = ('uploaded', 'downloaded', 'left')
+
+# فاصله حداقل بین دو بار نوشتن last_used یک توکن
+TOKEN_LAST_USED_INTERVAL = timezone.timedelta(seconds=60)
+
+logger = logging.getLogger(__name__)
+
 
 def get_client_ip(request):
     """دریافت IP آدرس کلاینت"""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
+        ip = x_forwarded_for.partition(',')[0].strip()
     else:
         ip = request.META.get('REMOTE_ADDR')
+    # IPv4-mapped IPv6 (سوکت dual-stack) به IPv4 ساده تبدیل می‌شود تا در پاسخ compact بیاید
+    if ip and ip[:7] == '::ffff:' and '.' in ip:
+        ip = ip[7:]
     return ip
 
 
+def query_info_hashes(request):
+    """info_hashهای query خام به صورت hex کوچک؛ Django مقدار باینری را با UTF-8 خراب می‌کند"""
+    info_hashes = []
+    # latin-1 هر بایت را به یک کاراکتر نگاشت می‌کند، پس داده باینری سالم می‌ماند
+    raw_query = request.META.get('QUERY_STRING', '')
+    for key, value in parse_qsl(raw_query, keep_blank_values=True, encoding='latin-1'):
+        if key != 'info_hash':
+            continue
+        if len(value) == 20:
+            info_hashes.append(value.encode('latin-1').hex())
+        elif HEX_INFO_HASH.fullmatch(value):
+            info_hashes.append(value.lower())
+    return info_hashes
+
+
 def validate_announce_params(params, request=None):
     """بررسی پارامترهای announce"""
-    required_params = ['info_hash', 'peer_id', 'port', 'uploaded', 'downloaded', 'left', 'compact', 'event']
-
-    for param in required_params:
+    for param in REQUIRED_ANNOUNCE_PARAMS:
         if param not in params:
             return False, f"Missing parameter: {param}"
 
+    # بررسی event (رشته خالی یعنی announce عادی)؛ eventهای ناشناخته رد می‌شوند
+    if params['event'] not in ANNOUNCE_EVENTS:
+        return False, "Invalid event"
+
     # بررسی فرمت info_hash
     info_hash = params.get('info_hash', '')
-    if len(info_hash) == 40 and all(c in '0123456789abcdefABCDEF' for c in info_hash):
+    if HEX_INFO_HASH.fullmatch(info_hash):
         # فرمت hex - استفاده مستقیم
         pass
     elif len(info_hash) == 20:
-        # فرمت binary - تبدیل به hex
-        info_hash = info_hash.hex()
+        # فرمت binary - تبدیل به hex (۲۰ کاراکتر یعنی هر بایت یک کاراکتر شده است)
+        info_hash = info_hash.encode('latin-1').hex()
         params['info_hash'] = info_hash
     elif len(info_hash) == 19 and '�' in info_hash:
         # فرمت UTF-8 corrupted binary - این حالت برای Transmission است
@@ -65,20 +120,29 @@ def validate_announce_params(params, request=None):
 
     # بررسی port
     try:
-        port = int(params.get('port', 0))
+        port = int(params['port'])
         if not (1 <= port <= 65535):
             return False, "Invalid port number"
     except ValueError:
         return False, "Invalid port format"
+    params['port'] = port
 
-    # بررسی مقادیر عددی
-    for param in ['uploaded', 'downloaded', 'left']:
+    # بررسی مقادیر عددی؛ مقدار تبدیل‌شده در params می‌ماند تا process_announce دوباره int() نکند
+    for param in COUNTER_PARAMS:
         try:
-            value = int(params.get(param, -1))
+            value = int(params[param])
             if value < 0:
                 return False, f"Invalid {param} value"
         except ValueError:
             return False, f"Invalid {param} format"
+        params[param] = value
+
+    # numwant اختیاری است؛ مقدار نامعتبر یا منفی همان پیش‌فرض ۵۰ را می‌گیرد
+    try:
+        numwant = int(params.get('numwant', 50))
+    except ValueError:
+        numwant = 50
+    params['numwant'] = min(numwant, 100) if numwant >= 0 else 50  # حداکثر 100 peer
 
     return True, "OK"
 
@@ -90,7 +154,7 @@ def validate_auth_token(request, info_hash):
         return None, "Missing auth_token"
 
     try:
-        token = AuthToken.objects.get(token=auth_token, is_active=True)
+        token = AuthToken.objects.select_related('user').get(token=auth_token, is_active=True)
     except AuthToken.DoesNotExist:
         return None, "Invalid auth_token"
 
@@ -103,13 +167,28 @@ def validate_auth_token(request, info_hash):
     if token.ip_bound and token.ip_bound != client_ip:
         return None, "IP address mismatch"
 
-    # بروزرسانی last_used
-    token.last_used = timezone.now()
-    token.save(update_fields=['last_used'])
+    # بروزرسانی last_used، حداکثر یک بار در هر TOKEN_LAST_USED_INTERVAL
+    now = timezone.now()
+    if token.last_used is None or now - token.last_used >= TOKEN_LAST_USED_INTERVAL:
+        AuthToken.objects.filter(pk=token.pk).update(last_used=now)
+        token.last_used = now
 
     return token.user, "OK"
 
 
+def get_announce_torrent(info_hash):
+    """تورنت برای announce، با cache کوتاه‌مدت تا announceهای پیاپی یک swarm به دیتابیس نروند"""
+    cache_key = TRACKER_TORRENT_CACHE_KEY.format(info_hash)
+    torrent = cache.get(cache_key)
+    if torrent is None:
+        torrent = Torrent.objects.only(
+            'id', 'info_hash', 'name', 'size', 'is_active', 'is_private', 'created_by_id'
+        ).filter(info_hash=info_hash).first()
+        if torrent is not None:
+            cache.set(cache_key, torrent, TRACKER_TORRENT_CACHE_TIMEOUT)
+    return torrent
+
+
 def check_rate_limit(identifier, action, max_requests, window_seconds):
     """بررسی rate limiting"""
     cache_key = f"ratelimit:{action}:{identifier}"
@@ -159,24 +238,13 @@ def announce(request):
         
         # Fix info_hash for URL-encoded binary data from transmission-cli
         # Django auto-decodes URL params, corrupting binary data
-        if 'info_hash' in params:
-            info_hash = params.get('info_hash', '')
+        info_hash = params.get('info_hash')
+        if info_hash is not None:
             # If it's not a valid 40-char hex string, try to get from raw query
-            if not (isinstance(info_hash, str) and len(info_hash) == 40 and 
-                    all(c in '0123456789abcdefABCDEF' for c in info_hash.lower())):
-                import urllib.parse
-                raw_query = request.META.get('QUERY_STRING', '')
-                for param_pair in raw_query.split('&'):
-                    if param_pair.startswith('info_hash='):
-                        encoded_value = param_pair.split('=', 1)[1]
-                        try:
-                            # Decode URL-encoded binary data
-                            decoded_bytes = urllib.parse.unquote_to_bytes(encoded_value)
-                            if len(decoded_bytes) == 20:
-                                params['info_hash'] = decoded_bytes.hex()
-                                break
-                        except:
-                            pass
+            if not HEX_INFO_HASH.fullmatch(info_hash):
+                info_hashes = query_info_hashes(request)
+                if info_hashes:
+                    params['info_hash'] = info_hashes[0]
 
         # بررسی پارامترهای پایه
         is_valid, error_msg = validate_announce_params(params, request)
@@ -185,9 +253,8 @@ def announce(request):
 
         # دریافت تورنت
         info_hash = params['info_hash'].lower()
-        try:
-            torrent = Torrent.objects.get(info_hash=info_hash)
-        except Torrent.DoesNotExist:
+        torrent = get_announce_torrent(info_hash)
+        if torrent is None:
             return create_bencoded_response({'failure reason': 'Torrent not found'})
 
         # بررسی IP blocking
@@ -211,7 +278,7 @@ def announce(request):
                 return create_bencoded_response({'failure reason': 'User banned'})
 
         # بررسی دسترسی کاربر به تورنت
-        if torrent.is_private and user and torrent.created_by != user:
+        if torrent.is_private and user and torrent.created_by_id != user.pk:
             # بررسی credit کافی برای دانلود
             torrent_size_gb = torrent.size / (1024 ** 3)
             required_credit = torrent_size_gb
@@ -236,8 +303,7 @@ def announce(request):
             return response
         except Exception as e:
             # Log the error for debugging
-            import logging
-            logging.error(f"Exception in process_announce: {e}", exc_info=True)
+            logger.error("Exception in process_announce: %s", e, exc_info=True)
             return create_bencoded_response({'failure reason': 'Internal server error'})
 
     except Exception as e:
@@ -256,13 +322,16 @@ def announce(request):
 def process_announce(user, torrent, params, client_ip, user_agent):
     """پردازش درخواست announce"""
 
+    # port، شمارنده‌ها و numwant در validate_announce_params به int تبدیل شده‌اند
     peer_id = params['peer_id']
-    port = int(params['port'])
-    uploaded = int(params['uploaded'])
-    downloaded = int(params['downloaded'])
-    left = int(params['left'])
-    event = params.get('event', 'started')
-    numwant = min(int(params.get('numwant', 50)), 100)  # حداکثر 100 peer
+    port = params['port']
+    uploaded = params['uploaded']
+    downloaded = params['downloaded']
+    left = params['left']
+    event = params['event']
+    numwant = params['numwant']
+    compact = params['compact'] == '1'
+    is_seeder = left == 0
 
     # بروزرسانی یا ایجاد peer
     if user:
@@ -278,7 +347,7 @@ def process_announce(user, torrent, params, client_ip, user_agent):
                 'downloaded': downloaded,
                 'left': left,
                 'state': event,
-                'is_seeder': left == 0,
+                'is_seeder': is_seeder,
                 'user_agent': user_agent,
             }
         )
@@ -298,7 +367,7 @@ def process_announce(user, torrent, params, client_ip, user_agent):
                 downloaded=downloaded,
                 left=left,
                 state=event,
-                is_seeder=left == 0,
+                is_seeder=is_seeder,
                 user_agent=user_agent,
             )
             created = True
@@ -312,9 +381,6 @@ def process_announce(user, torrent, params, client_ip, user_agent):
         upload_diff = uploaded - peer.uploaded
         download_diff = downloaded - peer.downloaded
 
-        # بررسی فعالیت‌های مشکوک پیشرفته
-        suspicious_reasons = []
-
         # بررسی مقادیر منفی
         if upload_diff < 0 or download_diff < 0:
             suspicious_reasons.append('negative_values')
@@ -327,6 +393,7 @@ def process_announce(user, torrent, params, client_ip, user_agent):
             suspicious_reasons.append('excessive_download')
 
         # بررسی الگوی announce (بیش از ۱ announce در دقیقه)
+        # AnnounceLog پس از commit و در پس‌زمینه نوشته می‌شود، پس این شمارش‌ها کمی از announceهای زنده عقب‌ترند
         recent_announces = AnnounceLog.objects.filter(
             user=user,
             timestamp__gte=timezone.now() - timezone.timedelta(minutes=1)
@@ -375,7 +442,7 @@ def process_announce(user, torrent, params, client_ip, user_agent):
         if user:
             user.lifetime_upload += max(0, upload_diff)
             user.lifetime_download += max(0, download_diff)
-            user.save(update_fields=['lifetime_upload', 'lifetime_download'])
+            user_fields = ['lifetime_upload', 'lifetime_download']
 
             # بروزرسانی credit
             if upload_diff > 0:
@@ -394,7 +461,10 @@ def process_announce(user, torrent, params, client_ip, user_agent):
                     description=f'Upload credit: {uploaded_gb:.2f} GB x {user.download_multiplier} = {final_credit:.2f}'
                 )
                 user.total_credit += Decimal(str(final_credit))
-                user.save(update_fields=['total_credit'])
+                user_fields.append('total_credit')
+
+            # یک UPDATE برای آمار و credit کاربر
+            user.save(update_fields=user_fields)
 
         # بروزرسانی peer
         peer.peer_id = peer_id
@@ -404,64 +474,81 @@ def process_announce(user, torrent, params, client_ip, user_agent):
         peer.downloaded = downloaded
         peer.left = left
         peer.state = event
-        peer.is_seeder = left == 0
+        peer.is_seeder = is_seeder
         peer.last_announced = timezone.now()
         peer.user_agent = user_agent
-        peer.save()
-
-    # بروزرسانی آمار تورنت
-    update_torrent_stats(torrent)
-
-    # لاگ announce
-    announce_log = AnnounceLog.objects.create(
-        user=user,
-        torrent=torrent,
-        event=event,
-        uploaded=uploaded,
-        downloaded=downloaded,
-        left=left,
-        ip_address=client_ip,
-        port=port,
-        peer_id=peer_id,
+        peer.save(update_fields=[
+            'peer_id', 'ip_address', 'port', 'uploaded', 'downloaded', 'left',
+            'state', 'is_seeder', 'last_announced', 'user_agent'
+        ])
+
+    # بروزرسانی آمار تورنت؛ eventها تعداد را تغییر می‌دهند، announceهای دوره‌ای فقط هر STATS_REFRESH_INTERVAL ثانیه
+    if event in STATS_CHANGING_EVENTS or cache.add(STATS_REFRESH_KEY.format(torrent.pk), True, STATS_REFRESH_INTERVAL):
+        update_torrent_stats(torrent)
+
+    # لاگ announce پس از commit تراکنش و در پس‌زمینه؛ فقط مقادیر ساده به task داده می‌شود
+    transaction.on_commit(partial(
+        enqueue_task,
+        record_announce_log,
+        torrent.pk,
+        user.pk if user else None,
+        event,
+        uploaded,
+        downloaded,
+        left,
+        client_ip,
+        port,
+        peer_id,
         user_agent=user_agent,
-        is_suspicious=bool(suspicious_reasons),
-        suspicious_reason=', '.join(suspicious_reasons) if suspicious_reasons else ''
-    )
+        suspicious_reason=', '.join(suspicious_reasons),
+        timestamp=timezone.now().isoformat()
+    ))
 
     # ایجاد لیست peerها
-    peers = get_peer_list(torrent, peer_id, numwant, params.get('compact') == '1')
+    peers = get_peer_list(torrent, peer_id, numwant, compact)
 
     # ایجاد پاسخ
-    response = {
-        'interval': settings.BITTORRENT_SETTINGS['TRACKER_ANNOUNCE_INTERVAL'],
-        'min interval': 300,  # حداقل 5 دقیقه
-        'peers': peers,
-    }
+    interval = settings.BITTORRENT_SETTINGS['TRACKER_ANNOUNCE_INTERVAL']
+    min_interval = 300  # حداقل 5 دقیقه
 
     # اگر تورنت کامل شده
+    complete = None
     if event == 'completed':
-        response['complete'] = torrent.stats.completed if hasattr(torrent, 'stats') else 0
+        complete = torrent.stats.completed if hasattr(torrent, 'stats') else 0
 
-    return create_bencoded_response(response)
+    if isinstance(peers, bytes):
+        encoded_peers = b'%d:%b' % (len(peers), peers)
+    else:
+        encoded_peers = encode_dict_peers(peers)
+
+    return HttpResponse(encode_announce(interval, min_interval, encoded_peers, complete), content_type='text/plain')
 
 
 def update_torrent_stats(torrent):
     """بروزرسانی آمار تورنت"""
-    try:
-        stats = torrent.stats
-    except TorrentStats.DoesNotExist:
+    stats = getattr(torrent, 'stats', None)
+    if stats is None:
         stats = TorrentStats.objects.create(torrent=torrent)
 
-    # محاسبه آمار از peerها
-    active_peers = torrent.peers.filter(
-        last_announced__gte=timezone.now() - timezone.timedelta(hours=1)
+    # محاسبه آمار از peerها در یک کوئری
+    now = timezone.now()
+    counts = torrent.peers.filter(
+        last_announced__gte=now - timezone.timedelta(hours=1)
+    ).aggregate(
+        seeders=Count('id', filter=Q(is_seeder=True)),
+        leechers=Count('id', filter=Q(is_seeder=False)),
     )
 
-    stats.seeders = active_peers.filter(is_seeder=True).count()
-    stats.leechers = active_peers.filter(is_seeder=False).count()
-    stats.last_updated = timezone.now()
+    stats.seeders = counts['seeders']
+    stats.leechers = counts['leechers']
+    stats.last_updated = now
     stats.save()
 
+    # همگام‌سازی seeders/leechers روی خود تورنت برای خواندن بدون join
+    Torrent.objects.filter(pk=torrent.pk).update(**counts)
+    torrent.seeders = counts['seeders']
+    torrent.leechers = counts['leechers']
+
 
 def get_peer_list(torrent, exclude_peer_id, numwant, compact=False):
     """ایجاد لیست peerها"""
@@ -469,33 +556,23 @@ def get_peer_list(torrent, exclude_peer_id, numwant, compact=False):
     # دریافت peerهای فعال (آخرین announce در ۱ ساعت گذشته)
     active_peers = torrent.peers.filter(
         last_announced__gte=timezone.now() - timezone.timedelta(hours=1)
-    ).exclude(peer_id=exclude_peer_id)[:numwant]
+    ).exclude(peer_id=exclude_peer_id)
 
     if compact:
-        # فرمت compact
-        peer_list = b''
-        for peer in active_peers:
-            # Use actual peer IP addresses for network connectivity
-            # Convert IP string to binary format for compact response
-            try:
-                ip_parts = peer.ip_address.split('.')
-                ip_bytes = bytes([int(part) for part in ip_parts])
-                port_bytes = peer.port.to_bytes(2, 'big')
-                peer_list += ip_bytes + port_bytes
-            except (ValueError, AttributeError):
-                # Skip invalid IPs
-                continue
-        return peer_list
+        # فرمت compact: ۶ بایت آماده برای هر peer؛ peerهای IPv6 آدرس compact ندارند
+        rows = active_peers.exclude(compact_address=b'').values_list('compact_address', flat=True)
+        return b''.join(sample_peers(rows, numwant))
     else:
-        # فرمت dictionary
-        peer_list = []
-        for peer in active_peers:
-            peer_list.append({
-                'ip': peer.ip_address,
-                'port': peer.port,
-                'peer id': peer.peer_id,
-            })
-        return peer_list
+        # فرمت dictionary: tupleهای (ip, port, peer_id) که encode_dict_peers مستقیم bencode می‌کند
+        return sample_peers(active_peers.values_list('ip_address', 'port', 'peer_id'), numwant)
+
+
+def sample_peers(rows, numwant):
+    """نمونه تصادفی numwant ردیف از حداکثر PEER_SAMPLE_POOL ردیف، تا همه کلاینت‌ها همان peerهای اول را نگیرند"""
+    rows = list(rows[:PEER_SAMPLE_POOL])
+    if len(rows) <= numwant:
+        return rows
+    return random.sample(rows, numwant)
 
 
 @csrf_exempt
@@ -520,37 +597,29 @@ def scrape(request):
         if not check_rate_limit(client_ip, 'scrape', 10, 60):  # حداکثر ۱۰ درخواست در دقیقه
             return create_bencoded_response({'failure reason': 'Rate limit exceeded'})
 
-        # دریافت لیست تورنت‌ها
-        info_hashes = request.GET.getlist('info_hash', [])
-
         # اگر هیچ info_hash مشخص نشده، تمام تورنت‌ها
-        if not info_hashes:
-            torrents = Torrent.objects.filter(is_active=True)
+        if 'info_hash' not in request.GET:
+            # scrape کامل: بدنه مرتب‌شده در دیتابیس ساخته و برای مدت کوتاهی کش می‌شود
+            body = cache.get_or_set(SCRAPE_ALL_CACHE_KEY, build_full_scrape, SCRAPE_ENTRY_CACHE_TIMEOUT)
         else:
-            # تبدیل به lowercase
-            info_hashes = [h.lower() for h in info_hashes]
-            torrents = Torrent.objects.filter(info_hash__in=info_hashes, is_active=True)
+            # دریافت لیست تورنت‌ها (hex یا باینری، همه به hex کوچک) از قطعه‌های bencoded کش‌شده
+            info_hashes = query_info_hashes(request)
+            cache_keys = {SCRAPE_ENTRY_CACHE_KEY.format(h): h for h in info_hashes}
+            entries = {cache_keys[key]: entry for key, entry in cache.get_many(cache_keys).items()}
+            missing = set(cache_keys.values()) - entries.keys()
+            if missing:
+                fresh = dict(iter_scrape_entries(Torrent.objects.filter(info_hash__in=missing, is_active=True)))
+                cache.set_many(
+                    {SCRAPE_ENTRY_CACHE_KEY.format(h): entry for h, entry in fresh.items()},
+                    SCRAPE_ENTRY_CACHE_TIMEOUT
+                )
+                entries.update(fresh)
+
+            # ترتیب hex کوچک و بزرگ یکسان است پس کلیدها مرتب می‌مانند
+            body = b''.join(entries[h] for h in sorted(entries))
 
         # ایجاد پاسخ
-        files = {}
-        for torrent in torrents:
-            try:
-                stats = torrent.stats
-                files[torrent.info_hash.upper()] = {
-                    'complete': stats.seeders,
-                    'downloaded': stats.completed,
-                    'incomplete': stats.leechers,
-                }
-            except TorrentStats.DoesNotExist:
-                files[torrent.info_hash.upper()] = {
-                    'complete': 0,
-                    'downloaded': 0,
-                    'incomplete': 0,
-                }
-
-        response = {'files': files}
-
-        return create_bencoded_response(response)
+        return HttpResponse(b'd5:filesd%bee' % body, content_type='text/plain')
 
     except Exception as e:
         # لاگ خطا
@@ -565,6 +634,41 @@ def scrape(request):
         return create_bencoded_response({'failure reason': 'Internal server error'})
 
 
+def iter_scrape_entries(torrents):
+    """(info_hash, قطعه bencoded آمار) برای هر تورنت؛ کلید پاسخ scrape همان info_hash با حروف بزرگ است"""
+    rows = torrents.values_list('info_hash', 'stats__seeders', 'stats__completed', 'stats__leechers')
+    for info_hash, seeders, completed, leechers in rows:
+        key = info_hash.upper().encode()
+        yield info_hash, b'%d:%bd8:completei%de10:downloadedi%de10:incompletei%dee' % (
+            len(key), key, seeders or 0, completed or 0, leechers or 0
+        )
+
+
+def build_full_scrape():
+    """قطعه‌های scrape همه تورنت‌های فعال، به ترتیب info_hash"""
+    torrents = Torrent.objects.filter(is_active=True).order_by('info_hash')
+    return b''.join(entry for _, entry in iter_scrape_entries(torrents))
+
+
+def encode_dict_peers(peers):
+    """bencode مستقیم tupleهای (ip, port, peer_id) به لیست dictionary (کلیدها: ip، peer id، port)"""
+    parts = [b'l']
+    for ip_address, port, peer_id in peers:
+        ip = ip_address.encode()
+        peer_id = peer_id.encode()
+        parts.append(b'd2:ip%d:%b7:peer id%d:%b4:porti%dee' % (len(ip), ip, len(peer_id), peer_id, port))
+    parts.append(b'e')
+    return b''.join(parts)
+
+
+def encode_announce(interval, min_interval, encoded_peers, complete=None):
+    """bencode پاسخ announce با ساختار ثابت (کلیدها به ترتیب مرتب)؛ encoded_peers از قبل bencode شده است"""
+    head = b'd8:completei%de' % complete if complete is not None else b'd'
+    return b'%b8:intervali%de12:min intervali%de5:peers%be' % (
+        head, interval, min_interval, encoded_peers
+    )
+
+
 def create_bencoded_response(data):
     """ایجاد پاسخ bencoded"""
     try:
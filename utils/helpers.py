@@ -3,11 +3,20 @@ Utility functions and helpers for the BitTorrent backend
 """
 import hashlib
 import hmac
+import logging
 import secrets
 import string
 from typing import Optional
 from django.utils import timezone
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 
 def generate_random_string(length: int = 32) -> str:
@@ -228,3 +237,22 @@ def create_error_response(message: str, error_code: str = None) -> dict:
     if error_code:
         response['error_code'] = error_code
     return response
+
+
+class OrjsonEncoder(DjangoJSONEncoder):
+    """JSONField encoder backed by orjson when it is installed"""
+
+    def encode(self, o):
+        if orjson is None:
+            return super().encode(o)
+        return orjson.dumps(o, default=self.default).decode('utf-8')
+
+
+def enqueue_task(task, *args, **kwargs) -> bool:
+    """Queue a Celery task; broker errors are logged instead of raised so logging never fails a request"""
+    try:
+        task.delay(*args, **kwargs)
+    except Exception as e:
+        logger.error("Failed to queue task %s: %s", task.name, e, exc_info=True)
+        return False
+    return True
@@ -1,4 +1,7 @@
 import hashlib
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
 from django.test import TestCase, RequestFactory
 from django.http import HttpRequest
 from unittest.mock import patch, MagicMock
@@ -23,6 +26,7 @@ from .helpers import (
     get_system_info,
     create_success_response,
     create_error_response,
+    OrjsonEncoder,
 )
 
 
@@ -334,3 +338,13 @@ class UtilsHelpersTestCase(TestCase):
             'error_code': 'VALIDATION_ERROR'
         }
         self.assertEqual(result, expected)
+
+    def test_orjson_encoder(self):
+        """Test OrjsonEncoder output matches the stdlib encoder semantics"""
+        self.assertEqual(json.loads(json.dumps(['a', 'b'], cls=OrjsonEncoder)), ['a', 'b'])
+
+        # Types orjson does not handle natively go through DjangoJSONEncoder.default
+        value = {'amount': Decimal('1.50'), 'at': datetime(2024, 1, 1, tzinfo=dt_timezone.utc)}
+        result = json.loads(json.dumps(value, cls=OrjsonEncoder))
+        self.assertEqual(result['amount'], '1.50')
+        self.assertTrue(result['at'].startswith('2024-01-01T00:00:00'))